@@ -0,0 +1,194 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURES
+from metrics import span
+from storage import read_table, write_table
+from valuation import LABELS, VALUATION_BAND, VALUATION_BAND_PCT, apply_valuation, valuation_codes
+
+ROWSTATE_SUFFIX = '.rowstate.npz'
+
+
+def clean_inputs(df):
+    """
+    Coerce the model inputs and Salary to numbers and drop rows where any
+    of them is missing. Returns (df, dropped_count).
+    """
+    missing_columns = [col for col in FEATURES + ["Salary"] if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f'Missing required columns: {", ".join(missing_columns)}')
+
+    # Convert columns to numeric
+    for col in FEATURES + ["Salary"]:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Drop rows with missing values
+    original_count = len(df)
+    df = df.dropna(subset=FEATURES + ["Salary"])
+    return df, original_count - len(df)
+
+
+def score_players(df, model):
+    """
+    Predict salaries for every player in df and add the Predicted_Salary,
+    Diff and Valuation columns. Rows with missing or non-numeric inputs are
+    dropped. Returns (scored_df, dropped_count).
+    """
+    with span('coerce'):
+        df, dropped_count = clean_inputs(df)
+
+    # Make predictions for all players
+    with span('predict'):
+        predictions = model.predict(df[FEATURES].to_numpy(dtype='float64'))
+    df['Predicted_Salary'] = predictions.astype(int)
+
+    # Add the Diff and Valuation columns in one vectorized pass
+    with span('valuation'):
+        apply_valuation(df)
+    return df, dropped_count
+
+
+def analyze_file(csv_path, model, output_path=None, loader=read_table):
+    """
+    Re-score the players in csv_path and publish the result atomically to
+    output_path (csv_path itself by default)
+    """
+    with span('load'):
+        df = loader(csv_path)
+    df, dropped_count = score_players(df, model)
+    with span('write'):
+        write_table(df, output_path or csv_path)
+    return {'rows': len(df), 'dropped': dropped_count}
+
+
+def row_keys(df):
+    """
+    Stable identity for every row across runs: PLAYER_ID when the table
+    has it, else the player name, plus an occurrence number for repeats
+    """
+    column = 'PLAYER_ID' if 'PLAYER_ID' in df.columns else 'PLAYER'
+    ids = df[column].astype(str)
+    occurrence = ids.groupby(ids.to_numpy(), sort=False).cumcount().astype(str)
+    return (ids + '#' + occurrence).to_numpy(dtype=str)
+
+
+def scoring_version(model_version, band=None, band_pct=None):
+    """Everything besides a row's own inputs that its score depends on"""
+    if band is None and band_pct is None:
+        band, band_pct = VALUATION_BAND, VALUATION_BAND_PCT
+    return f'{model_version}|band={band}|band_pct={band_pct}'
+
+
+def row_fingerprints(df, version):
+    """64-bit hash per row of its features, Salary and the scoring version"""
+    hashes = pd.util.hash_pandas_object(df[FEATURES + ['Salary']].astype('float64'), index=False).to_numpy()
+    salt = np.frombuffer(hashlib.sha1(version.encode('utf-8')).digest()[:8], dtype=np.uint64)[0]
+    return hashes ^ salt
+
+
+def load_row_state(output_path):
+    """The row state saved by the last incremental run, or None"""
+    try:
+        with np.load(output_path + ROWSTATE_SUFFIX, allow_pickle=False) as state:
+            return {name: state[name] for name in ('keys', 'fingerprints', 'predicted', 'codes')}
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def save_row_state(output_path, keys, fingerprints, predicted, codes):
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, keys=keys, fingerprints=fingerprints, predicted=predicted, codes=codes)
+    os.replace(tmp_path, output_path + ROWSTATE_SUFFIX)
+
+
+def analyze_incremental(csv_path, model, model_version, output_path=None, loader=read_table,
+                        band=None, band_pct=None, full=False):
+    """
+    Like analyze_file, but only rows whose features, Salary or scoring
+    version changed since the last run are predicted; the other rows keep
+    their stored scores. full=True re-predicts every row.
+
+    Returns a summary with 'changes': the rows whose Valuation flipped
+    (added and removed players are listed separately).
+    """
+    output_path = output_path or csv_path
+    with span('load'):
+        df = loader(csv_path)
+    with span('coerce'):
+        df, dropped_count = clean_inputs(df)
+        df = df.reset_index(drop=True)
+
+    with span('fingerprint'):
+        keys = row_keys(df)
+        fingerprints = row_fingerprints(df, scoring_version(model_version, band, band_pct))
+        state = load_row_state(output_path)
+    if state is None:
+        state = {'keys': np.empty(0, dtype=str), 'fingerprints': np.empty(0, dtype=np.uint64),
+                 'predicted': np.empty(0, dtype=np.int64), 'codes': np.empty(0, dtype=np.int8)}
+        first_run = True
+    else:
+        first_run = False
+
+    # Rows seen last time with an identical fingerprint keep their score
+    previous = pd.Index(state['keys']).get_indexer(keys)
+    known = previous >= 0
+    clean = known.copy()
+    clean[known] = state['fingerprints'][previous[known]] == fingerprints[known]
+    if full:
+        clean[:] = False
+    dirty = np.flatnonzero(~clean)
+
+    predicted = np.zeros(len(df), dtype=np.int64)
+    predicted[clean] = state['predicted'][previous[clean]]
+    if len(dirty):
+        with span('predict'):
+            X = df[FEATURES].to_numpy(dtype='float64')[dirty]
+            predicted[dirty] = np.asarray(model.predict(X)).astype(int)
+
+    with span('valuation'):
+        salary = df['Salary'].to_numpy(dtype='float64')
+        diff, codes = valuation_codes(predicted, salary, band, band_pct)
+
+    # Re-scoring a table in place with nothing dirty would rewrite the same file
+    unchanged = (not first_run and not len(dirty) and csv_path == output_path
+                 and np.array_equal(state['keys'], keys))
+    if not unchanged:
+        df['Predicted_Salary'] = predicted
+        df['Diff'] = diff
+        df['Valuation'] = LABELS[codes]
+        with span('write'):
+            write_table(df, output_path)
+    with span('save_state'):
+        save_row_state(output_path, keys, fingerprints, predicted, codes)
+
+    old_codes = np.full(len(df), -1, dtype=np.int8)
+    old_codes[known] = state['codes'][previous[known]]
+    changes = []
+    for row in np.flatnonzero(known & (codes != old_codes)):
+        changes.append({
+            'key': keys[row],
+            'player': df['PLAYER'].iloc[row] if 'PLAYER' in df.columns else None,
+            'from': LABELS[old_codes[row]],
+            'to': LABELS[codes[row]],
+            'predicted_salary': int(predicted[row]),
+            'salary': float(salary[row]),
+            'diff': float(diff[row])
+        })
+
+    return {
+        'rows': len(df),
+        'dropped': dropped_count,
+        'scored': len(dirty),
+        'reused': len(df) - len(dirty),
+        'written': not unchanged,
+        'first_run': first_run,
+        'added': [] if first_run else keys[~known].tolist(),
+        'removed': [] if first_run else sorted(set(state['keys'].tolist()) - set(keys.tolist())),
+        'changes': changes
+    }
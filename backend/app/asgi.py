@@ -0,0 +1,220 @@
+"""
+ASGI entry point serving the same Flask routes.
+
+    uvicorn asgi:app --workers 4
+    SERVER_MODE=asgi gunicorn --config gunicorn.conf.py
+
+The event loop only moves bytes. Every request runs the Flask app in a
+bounded thread pool, and routes are split between two pools: predictions
+get their own, so a long /analyze-players?wait=1 or a large export tying up
+the I/O pool never queues a /predict behind it. Each pool admits at most
+its thread count plus ASGI_QUEUE_DEPTH requests; anything beyond that is
+answered 503 with Retry-After straight from the event loop instead of
+piling up. Streaming responses are pulled from the app one chunk at a
+time, each chunk on the pool.
+"""
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from main import app as flask_app
+
+CPU_COUNT = os.cpu_count() or 1
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 16 * 1024 * 1024))
+
+
+class Lane:
+    """A bounded thread pool plus the admission limit in front of it"""
+
+    def __init__(self, name, threads, queue_depth):
+        self.name = name
+        self.threads = threads
+        self.max_inflight = threads + queue_depth
+        self.inflight = 0
+        self.rejected = 0
+        self._executor = None
+
+    @property
+    def executor(self):
+        # Created on first use, i.e. in the worker after any fork
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads,
+                                                thread_name_prefix=f'asgi-{self.name}')
+        return self._executor
+
+    def try_acquire(self):
+        # Only touched from the event loop thread, so no lock is needed
+        if self.inflight >= self.max_inflight:
+            self.rejected += 1
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self):
+        self.inflight -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    environ.setdefault('CONTENT_LENGTH', str(len(body)))
+    return environ
+
+
+_DONE = object()
+
+
+class WSGIBridge:
+    """
+    ASGI application running a WSGI app on bounded thread pools, with the
+    pool picked per request by route(path) -> Lane
+    """
+
+    def __init__(self, wsgi_app, lanes, route):
+        self.wsgi_app = wsgi_app
+        self.lanes = lanes
+        self.route = route
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for lane in self.lanes.values():
+                    lane.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        lane = self.route(scope['path'])
+        if not lane.try_acquire():
+            await self._error(send, 503, 'Server busy, retry shortly', [(b'retry-after', b'1')])
+            return
+        try:
+            body = await self._read_body(receive)
+            if body is None:
+                await self._error(send, 413, 'Request body too large')
+                return
+            await self._respond(lane, build_environ(scope, body), send)
+        finally:
+            lane.release()
+
+    async def _read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    async def _respond(self, lane, environ, send):
+        loop = asyncio.get_running_loop()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                  for name, value in headers]
+            return lambda data: None
+
+        def first_chunk():
+            result = self.wsgi_app(environ, start_response)
+            iterator = iter(result)
+            return result, next(iterator, _DONE), iterator
+
+        # Chunks of one response may be produced on different pool threads;
+        # running every step in the same context keeps Flask's request
+        # context (pushed by stream_with_context) valid between them
+        context = contextvars.copy_context()
+
+        result, chunk, iterator = await loop.run_in_executor(lane.executor, context.run, first_chunk)
+        try:
+            await send({'type': 'http.response.start', 'status': started['status'],
+                        'headers': started['headers']})
+            while chunk is not _DONE:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(lane.executor, context.run, next, iterator, _DONE)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(lane.executor, context.run, close)
+
+    async def _error(self, send, status, message, headers=()):
+        body = json.dumps({'error': message, 'status': 'error'}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode('latin-1')), *headers]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+queue_depth = int(os.environ.get('ASGI_QUEUE_DEPTH', 64))
+lanes = {
+    # Inference is short and CPU-bound; more threads than cores only adds
+    # GIL contention
+    'inference': Lane('inference', int(os.environ.get('ASGI_INFERENCE_THREADS', CPU_COUNT)), queue_depth),
+    # Table loads, exports and analysis triggers wait on disk and on locks
+    'io': Lane('io', int(os.environ.get('ASGI_IO_THREADS', max(4, 2 * CPU_COUNT))), queue_depth),
+}
+
+
+def route(path):
+    return lanes['inference'] if path.startswith('/predict') else lanes['io']
+
+
+app = WSGIBridge(flask_app, lanes, route)
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import time
+
+CHANGES_SUFFIX = '.changes.jsonl'
+
+
+class ChangeLog:
+    """
+    Valuation deltas published by incremental analysis runs of one table,
+    kept as a JSON-lines file next to it so every worker can serve them.
+    Each entry gets an increasing seq; consumers poll with the last seq
+    they saw instead of reloading the whole table. Only the newest
+    max_entries are kept.
+
+    Writers are expected to hold the table's analysis lock.
+    """
+
+    def __init__(self, table_path, max_entries=200):
+        self.path = table_path + CHANGES_SUFFIX
+        self.max_entries = max_entries
+
+    def entries(self):
+        try:
+            with open(self.path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def last_seq(self):
+        entries = self.entries()
+        return entries[-1]['seq'] if entries else 0
+
+    def publish(self, entry):
+        """Append entry and return its seq"""
+        entries = self.entries()
+        seq = (entries[-1]['seq'] if entries else 0) + 1
+        entries.append(dict(entry, seq=seq, published_at=time.time()))
+        entries = entries[-self.max_entries:]
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, 'w') as f:
+            for item in entries:
+                f.write(json.dumps(item, separators=(',', ':')) + '\n')
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+        return seq
+
+    def since(self, seq):
+        """Entries published after seq, oldest first"""
+        return [entry for entry in self.entries() if entry['seq'] > seq]
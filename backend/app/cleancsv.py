@@ -1,6 +1,6 @@
-import pandas as pd
+from storage import read_table, write_table
 
-nba_df = pd.read_csv('nba_stats_24-25.csv')
+nba_df = read_table('nba_stats_24-25.csv')
 nba_df_new = nba_df[['PLAYER', 'TEAM', 'Age', 'GP', 'PTS', 'TRB', 'AST', 'BLK', 'Salary', 'TS%']]
 nba_df_new
-nba_df_new.to_csv('nba_stats_24-25_new.csv', index=False)
+write_table(nba_df_new, 'nba_stats_24-25_new.csv')
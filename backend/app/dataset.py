@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from metrics import span
+from roster import CompactRoster
+from storage import read_table
+
+# Rows decoded at a time while building the /allplayers body
+SERIALIZE_CHUNK_ROWS = 5000
+
+
+def serialize_players(roster):
+    """
+    The full /allplayers JSON body for roster, encoded a chunk of rows at a
+    time so no list of every record is ever built
+    """
+    parts = []
+    for start in range(0, len(roster), SERIALIZE_CHUNK_ROWS):
+        records = roster.records(slice(start, start + SERIALIZE_CHUNK_ROWS))
+        parts.append(json.dumps(records, separators=(',', ':'))[1:-1])
+    return (f'{{"count":{len(roster)},"data":[' + ','.join(parts) + '],"status":"success"}').encode('utf-8')
+
+
+class DatasetEntry:
+    """
+    One loaded version of a dataset file: its rows as a CompactRoster, the
+    JSON body served by /allplayers and its ETag. Anything else derived
+    from the rows (indexes, aggregates, ...) is memoized on the entry via
+    derived(), so it is rebuilt exactly when the file changes.
+
+    The ETag comes from the file's path and version, so it is the same in
+    every worker and never requires serializing the table; the body is
+    only built on first use, so streaming exports never materialize it.
+    """
+
+    def __init__(self, path, key, df):
+        self.path = path
+        self.key = key
+        # The parsed frame is only kept in compact form
+        self.roster = CompactRoster(df)
+        self.count = len(df)
+        self.etag = hashlib.sha1(f'{os.path.abspath(path)}:{key}'.encode('utf-8')).hexdigest()
+
+        self.last_used = time.monotonic()
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    @property
+    def body(self):
+        with span('serialize'):
+            return self.derived('body', serialize_players)
+
+    def derived(self, name, builder):
+        """Return builder(self.roster), computed once per loaded version of the file"""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self.roster)
+            return self._derived[name]
+
+
+class DatasetCache:
+    """
+    Process-wide cache of parsed dataset files keyed by path, mtime and size.
+    A request only pays for an os.stat() unless the file changed on disk.
+    With max_entries set, the least recently used files are dropped once
+    more than that many are loaded.
+    """
+
+    def __init__(self, loader=read_table, max_entries=None):
+        self._loader = loader
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the DatasetEntry for path, reloading it if the file changed"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.key == key:
+            entry.last_used = time.monotonic()
+            return entry
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            entry = self._entries.get(path)
+            if entry is None or entry.key != key:
+                with span('dataset_load'):
+                    entry = DatasetEntry(path, key, self._loader(path))
+                self._entries[path] = entry
+                self._evict()
+            entry.last_used = time.monotonic()
+            return entry
+
+    def loaded(self):
+        """Paths currently held in memory"""
+        return list(self._entries)
+
+    def _evict(self):
+        if self.max_entries is None:
+            return
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda path: self._entries[path].last_used)
+            del self._entries[oldest]
+
+    def invalidate(self, path=None):
+        """Drop one cached path, or everything when path is None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# Shared by every request handled in this worker process
+datasets = DatasetCache()
@@ -0,0 +1,89 @@
+"""
+Streaming exports of the player table.
+
+Rows are serialized a chunk at a time from a generator, so a response
+never holds more than one chunk's worth of records and the first bytes go
+out as soon as the first chunk is encoded.
+"""
+import json
+
+import numpy as np
+
+EXPORT_CHUNK_ROWS = 2000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_format(args, accept):
+    """
+    'ndjson' or 'csv' when the request asks for a streaming export via
+    ?format= or the Accept header, else None
+    """
+    fmt = args.get('format')
+    if fmt:
+        fmt = fmt.lower()
+        if fmt == 'json':
+            return None
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown format {fmt!r}, expected one of: json, {", ".join(FORMATS)}')
+        return fmt
+    best = accept.best_match(['application/json', *FORMATS.values()], default='application/json')
+    for name, mimetype in FORMATS.items():
+        if best == mimetype:
+            return name
+    return None
+
+
+def _chunks(roster, ids, columns, chunk_rows):
+    # Rows are decoded from the compact columns one chunk at a time
+    n = len(roster) if ids is None else len(ids)
+    for start in range(0, n, chunk_rows):
+        rows = slice(start, start + chunk_rows) if ids is None else ids[start:start + chunk_rows]
+        yield roster.take(rows, columns)
+
+
+def _ndjson(chunk):
+    # json.dumps rather than DataFrame.to_json, so floats are written the
+    # same way as in the JSON responses (27.6, not 27.600000000000001)
+    records = chunk.astype(object).where(chunk.notna(), None).to_dict(orient='records')
+    return ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records).encode('utf-8')
+
+
+def iter_ndjson(roster, ids=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """One JSON object per line; missing values are written as null"""
+    columns = list(roster.columns) if columns is None else columns
+    for chunk in _chunks(roster, ids, columns, chunk_rows):
+        yield _ndjson(chunk)
+
+
+def iter_csv(roster, ids=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """CSV with a header row, in the same layout as the exported tables"""
+    columns = list(roster.columns) if columns is None else columns
+    yield roster.take(slice(0, 0), columns).to_csv(index=False).encode('utf-8')
+    for chunk in _chunks(roster, ids, columns, chunk_rows):
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+
+def iter_frames(fmt, frames):
+    """
+    Stream DataFrames produced one at a time (all with the same columns)
+    as one NDJSON or CSV document
+    """
+    header = True
+    for chunk in frames:
+        if fmt == 'ndjson':
+            yield _ndjson(chunk)
+        else:
+            yield chunk.to_csv(index=False, header=header).encode('utf-8')
+            header = False
+
+
+def iter_export(fmt, roster, ids=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    if ids is not None:
+        ids = np.asarray(ids)
+    if fmt == 'ndjson':
+        return iter_ndjson(roster, ids, columns, chunk_rows)
+    return iter_csv(roster, ids, columns, chunk_rows)
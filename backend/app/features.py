@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+
+# Feature order expected by the model - every prediction path builds its
+# input in exactly this order
+FEATURES = ["Age", "GP", "TRB", "AST", "PTS", "BLK", "TS%"]
+
+
+def feature_row(data):
+    """
+    Validate a single player's JSON payload and return its feature values
+    as a list of floats in FEATURES order
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object with the player features')
+
+    row = []
+    for col in FEATURES:
+        value = data.get(col)
+        if value is None:
+            raise ValueError(f'Missing required feature: {col}')
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Feature {col} must be numeric, got {value!r}')
+        # float() also accepts "nan" and "inf", which the model cannot use
+        if not math.isfinite(value):
+            raise ValueError(f'Feature {col} must be a finite number')
+        row.append(value)
+    return row
+
+
+def feature_matrix(payload):
+    """
+    Validate a batch payload and return an (n_players, n_features) float array.
+
+    Accepts either a JSON array of player objects, a columnar object mapping
+    each feature to a list of values, or either of those wrapped as
+    {"players": ...}.
+    """
+    if isinstance(payload, dict) and 'players' in payload:
+        payload = payload['players']
+
+    if isinstance(payload, list):
+        # Row-oriented: validate every record, then build the matrix once
+        rows = []
+        for i, record in enumerate(payload):
+            try:
+                rows.append(feature_row(record))
+            except ValueError as e:
+                raise ValueError(f'Player {i}: {e}')
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+
+    if isinstance(payload, dict):
+        # Columnar: one list per feature, all of the same length
+        missing = [col for col in FEATURES if col not in payload]
+        if missing:
+            raise ValueError(f'Missing required features: {", ".join(missing)}')
+
+        columns = [payload[col] for col in FEATURES]
+        if any(not isinstance(values, list) for values in columns):
+            raise ValueError('Columnar payload values must be lists')
+        lengths = {len(values) for values in columns}
+        if len(lengths) != 1:
+            raise ValueError('Columnar payload lists must all have the same length')
+
+        try:
+            matrix = np.array(columns, dtype=np.float64).T
+        except (TypeError, ValueError):
+            raise ValueError('Columnar payload values must be numeric')
+        if not np.isfinite(matrix).all():
+            raise ValueError('Columnar payload contains missing or non-finite values')
+        return np.ascontiguousarray(matrix)
+
+    raise ValueError('Expected a JSON array of players or a columnar object of features')
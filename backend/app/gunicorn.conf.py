@@ -0,0 +1,37 @@
+import gc
+import multiprocessing
+import os
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+# Import main (and load the model and any other module-level state) once in
+# the master; workers are forked from it and share those pages copy-on-write
+preload_app = True
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# SERVER_MODE=asgi serves asgi:app on uvicorn workers; the default is the
+# plain WSGI app on threaded workers
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # One event loop per core; each worker bounds its own thread pools
+    workers = int(os.environ.get('WEB_CONCURRENCY', CPU_COUNT))
+else:
+    wsgi_app = 'main:app'
+    worker_class = 'gthread'
+    # The GIL limits each process to about one core of Python, so one
+    # process per core, with threads to overlap I/O and lock waits
+    workers = int(os.environ.get('WEB_CONCURRENCY', CPU_COUNT))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# /analyze-players?wait=1 can hold a request for a whole re-score
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the garbage collector's view, so
+    # collections in the workers don't touch (and copy) the shared pages
+    gc.freeze()
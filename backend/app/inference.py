@@ -0,0 +1,99 @@
+"""
+Prediction backends for the served model.
+
+A fitted linear model is exported to its coefficients when it is loaded,
+so predictions skip sklearn's per-call validation: a NumPy dot product
+for matrices and plain float arithmetic for a single row. Any other model,
+or a linear one whose exported form does not reproduce model.predict, is
+served through sklearn unchanged.
+"""
+import numpy as np
+
+from features import FEATURES
+
+# Relative tolerance for the exported coefficients to count as equal to
+# model.predict (salaries are ~1e7, so this is well under a dollar)
+CHECK_RTOL = 1e-9
+
+
+class SklearnPredictor:
+    """model.predict for everything"""
+
+    backend = 'sklearn'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def predict_row(self, row):
+        return float(self.model.predict(np.array([row], dtype=np.float64))[0])
+
+
+class LinearPredictor:
+    """X @ coef_ + intercept_ without going through sklearn"""
+
+    backend = 'linear'
+
+    def __init__(self, coef, intercept):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        # Python floats for the single-row path; a NumPy call on a 7-element
+        # array costs more than the arithmetic itself
+        self._coef_list = self.coef.tolist()
+
+    @classmethod
+    def from_model(cls, model):
+        """None unless model exposes one coefficient per feature"""
+        coef = getattr(model, 'coef_', None)
+        intercept = getattr(model, 'intercept_', None)
+        if coef is None or intercept is None:
+            return None
+        coef = np.asarray(coef, dtype=np.float64)
+        intercept = np.asarray(intercept, dtype=np.float64)
+        # Multi-output models keep a (1, n) coef_ and (1,) intercept_
+        if coef.ndim == 2 and coef.shape[0] == 1:
+            coef = coef[0]
+        if intercept.ndim == 1 and intercept.shape == (1,):
+            intercept = intercept[0]
+        if coef.shape != (len(FEATURES),) or intercept.ndim != 0:
+            return None
+        return cls(coef, intercept)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_row(self, row):
+        total = self.intercept
+        for c, x in zip(self._coef_list, row):
+            total += c * x
+        return total
+
+
+def check_rows(n=256, seed=0):
+    """Inputs spanning the real feature ranges, used to verify an export"""
+    rng = np.random.default_rng(seed)
+    low = np.array([19, 1, 0, 0, 0, 0, 0.3])
+    high = np.array([42, 82, 15, 12, 36, 4, 0.8])
+    return np.vstack([np.zeros(len(FEATURES)), rng.uniform(low, high, (n, len(FEATURES)))])
+
+
+def make_predictor(model):
+    """
+    The fastest backend that reproduces model.predict: LinearPredictor when
+    the model is linear and its export matches, SklearnPredictor otherwise
+    """
+    predictor = LinearPredictor.from_model(model)
+    if predictor is None:
+        return SklearnPredictor(model)
+
+    X = check_rows()
+    expected = np.asarray(model.predict(X), dtype=np.float64).ravel()
+    scale = max(1.0, float(np.abs(expected).max()))
+    if not np.allclose(predictor.predict(X), expected, rtol=0, atol=CHECK_RTOL * scale):
+        return SklearnPredictor(model)
+    singles = np.array([predictor.predict_row(row) for row in X.tolist()])
+    if not np.allclose(singles, expected, rtol=0, atol=CHECK_RTOL * scale):
+        return SklearnPredictor(model)
+    return predictor
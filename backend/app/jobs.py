@@ -0,0 +1,138 @@
+import contextlib
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on path + '.lock' across processes.
+    Yields True if the lock was free, False if we had to wait for another
+    process to finish with it.
+    """
+    with open(path + '.lock', 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            waited = False
+        except BlockingIOError:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            waited = True
+        try:
+            yield not waited
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class AnalysisJobs:
+    """
+    Runs dataset re-analysis in a background thread.
+
+    Job status is kept as small JSON files in jobs_dir so any gunicorn
+    worker can answer a status request. Each dataset has at most one
+    running and one queued job in this process: a trigger that arrives
+    while a run is in progress queues a job that starts when it finishes,
+    since the running job may have read the file before the change that
+    caused the trigger. Further triggers fold into the queued job, which
+    has not read anything yet; their truthy params (e.g. full=True) are
+    kept. Runs in different processes take turns on the dataset lock.
+    """
+
+    def __init__(self, jobs_dir, analyze):
+        self.jobs_dir = jobs_dir
+        self._analyze = analyze
+        # csv_path -> id of the running job / (queued job, its params)
+        self._running = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def submit(self, csv_path, **params):
+        """Start or queue a run for csv_path. Returns (job, coalesced)."""
+        csv_path = os.path.abspath(csv_path)
+        with self._lock:
+            pending = self._pending.get(csv_path)
+            if pending is not None:
+                job, queued_params = pending
+                queued_params.update({name: value for name, value in params.items() if value})
+                return dict(job), True
+
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'dataset': os.path.basename(csv_path),
+                'state': 'queued',
+                'submitted_at': time.time()
+            }
+            self._save(job)
+            if csv_path in self._running:
+                self._pending[csv_path] = (job, dict(params))
+                return dict(job), False
+            self._running[csv_path] = job['job_id']
+
+        self._start(job, csv_path, params)
+        return dict(job), False
+
+    def get(self, job_id):
+        """Return the status dict for job_id, or None if it is unknown"""
+        # Job ids are uuid hex strings; reject anything else before it
+        # reaches the filesystem
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def wait(self, job_id, timeout=None, interval=0.05):
+        """Poll until job_id finishes or timeout elapses; returns its status"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['state'] in ('succeeded', 'failed'):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def _start(self, job, csv_path, params):
+        thread = threading.Thread(target=self._run, args=(dict(job), csv_path, params),
+                                  name=f"analysis-{job['job_id']}", daemon=True)
+        thread.start()
+
+    def _run(self, job, csv_path, params):
+        try:
+            job.update(state='running', started_at=time.time())
+            self._save(job)
+            # Always analyze once the lock is ours, even after waiting for
+            # another process: the file may have changed since its run
+            # read it, and a run over an unchanged file is cheap
+            with file_lock(csv_path):
+                job['result'] = self._analyze(csv_path, **params)
+            job['state'] = 'succeeded'
+        except Exception as e:
+            job.update(state='failed', error=str(e))
+        finally:
+            job['finished_at'] = time.time()
+            with self._lock:
+                self._save(job)
+                pending = self._pending.pop(csv_path, None)
+                if pending is None:
+                    self._running.pop(csv_path, None)
+                else:
+                    self._running[csv_path] = pending[0]['job_id']
+            if pending is not None:
+                self._start(pending[0], csv_path, pending[1])
+
+    def _path(self, job_id):
+        return os.path.join(self.jobs_dir, job_id + '.json')
+
+    def _save(self, job):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.jobs_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self._path(job['job_id']))
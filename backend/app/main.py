@@ -1,13 +1,181 @@
-from flask import Flask, request, jsonify
-import pandas as pd
-from joblib import load
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import numpy as np
+import pandas as pd
+import hashlib
+import hmac
 import os
+import tempfile
+import time
+import warnings
+
+from analysis import analyze_incremental
+from changes import ChangeLog
+from export import FORMATS, export_format, iter_export, iter_frames
+from features import FEATURES, feature_row, feature_matrix
+from jobs import AnalysisJobs, file_lock
+from metrics import (ANALYSIS_RUNS, DROPPED_ROWS, REQUEST_LATENCY, SCORED_ROWS, SamplingProfiler,
+                     metrics, recording_spans, request_spans, span, start_request_spans)
+from predcache import PredictionCache
+from projection import ProjectionGrid, json_ints, parse_scenarios, parse_years, payload_salaries
+from query import PlayerIndex, export_rows, is_query, run_query
+from registry import ModelRegistry
+from seasons import APP_DIR, SeasonCatalog, load_season_table, player_key
+from similar import DEFAULT_NEIGHBORS, SimilarityIndex, neighbor_count
+from teams import TeamAggregates
 
 app = Flask(__name__)
 
-# Load the pre-trained model
-model = load('../model/linear_regression_model.joblib')
+# Repeated /predict inputs (UI sliders re-sending the same stats) are served
+# from a per-worker LRU keyed by model version and rounded features
+prediction_ttl = os.environ.get('PREDICTION_CACHE_TTL')
+prediction_cache = PredictionCache(
+    max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+    decimals=int(os.environ.get('PREDICTION_CACHE_DECIMALS', 4)),
+    ttl=float(prediction_ttl) if prediction_ttl else None
+)
+
+@metrics.collect
+def prediction_cache_metrics():
+    stats = prediction_cache.stats()
+    yield 'nba_prediction_cache_entries', 'gauge', 'Entries in the prediction cache', [({}, stats['size'])]
+    for name in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        yield (f'nba_prediction_cache_{name}_total', 'counter', f'Prediction cache {name}',
+               [({}, stats[name])])
+
+# What-if grids up to PROJECTION_MAX_JSON_CELLS cells can be returned as one
+# JSON document; anything larger (up to PROJECTION_MAX_CELLS) must be
+# streamed as NDJSON or CSV
+projection_max_json_cells = int(os.environ.get('PROJECTION_MAX_JSON_CELLS', 100000))
+projection_max_cells = int(os.environ.get('PROJECTION_MAX_CELLS', 10000000))
+
+# The model was fitted on a DataFrame, so sklearn warns when it is given a
+# plain NumPy array. The prediction paths below always build arrays in
+# FEATURES order, so the warning is noise.
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+# Versioned models; the active one is loaded here at import, so under
+# gunicorn's preload_app it is loaded once in the master and shared
+# copy-on-write by the forked workers
+model_dir = os.environ.get('MODEL_DIR', os.path.join(APP_DIR, '..', 'model'))
+models = ModelRegistry(model_dir, os.environ.get('MODEL_VERSION', 'linear_regression_model'),
+                       pointer_path=os.environ.get('MODEL_POINTER'))
+models.current()
+
+# One partition per season. Analysis output is written to DATA_DIR; raw
+# tables are also picked up from the model directory. Only the most
+# recently used SEASON_CACHE_SIZE partitions stay in memory.
+data_dir = os.environ.get('DATA_DIR', APP_DIR)
+seasons = SeasonCatalog(
+    [data_dir, model_dir],
+    output_dir=data_dir,
+    max_loaded=int(os.environ.get('SEASON_CACHE_SIZE', 3)),
+    default_season=os.environ.get('DEFAULT_SEASON', '24-25')
+)
+
+def analyze_season(output_path, season, full=False):
+    """
+    Score a season's current table and publish it to output_path. Only
+    rows that changed since the last run are re-predicted; players whose
+    Valuation flipped are published to the season's change log.
+    """
+    source_path = seasons.source_path(season)
+    if source_path is None:
+        raise FileNotFoundError(f'No data for season {season}')
+    handle = models.current()
+    try:
+        with recording_spans() as spans:
+            result = analyze_incremental(source_path, handle.predictor, handle.version,
+                                         output_path=output_path, loader=load_season_table, full=full)
+    except Exception:
+        ANALYSIS_RUNS.inc(season=season, outcome='error')
+        raise
+    ANALYSIS_RUNS.inc(season=season, outcome='success')
+    DROPPED_ROWS.inc(result['dropped'], season=season)
+    SCORED_ROWS.inc(result['scored'], season=season)
+    result['timings_ms'] = {name: round(duration * 1000, 2) for name, duration in spans}
+    result['model_version'] = handle.version
+    
+    # The job keeps the counts; the rows themselves go to the change log
+    delta = {key: result.pop(key) for key in ('changes', 'added', 'removed')}
+    result.update({key + '_count': len(value) for key, value in delta.items()})
+    if any(delta.values()):
+        result['changes_seq'] = ChangeLog(output_path).publish(
+            dict(delta, model_version=handle.version, season=season))
+    return result
+
+# Background re-analysis; job status files are shared by all workers
+jobs_dir = os.environ.get('ANALYSIS_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'nba-analysis-jobs'))
+analysis_jobs = AnalysisJobs(jobs_dir, analyze_season)
+# Longest ?wait=1 blocks a request before answering 202 with the job URL
+analysis_wait_timeout = float(os.environ.get('ANALYSIS_WAIT_TIMEOUT', 60))
+
+def season_not_found(season):
+    return jsonify({
+        'error': f'No data for season {season}',
+        'seasons': seasons.seasons(),
+        'status': 'error'
+    }), 404
+
+def player_features(season, player):
+    """Feature row for a player's stats in one season"""
+    entry = seasons.get(season)
+    rows = seasons.find_player(entry, player)
+    if not len(rows):
+        raise KeyError(f'Player not found in season {seasons.resolve(season)}: {player}')
+    return feature_row(entry.roster.records(rows[:1], FEATURES)[0])
+
+@app.before_request
+def start_instrumentation():
+    g.request_start = time.perf_counter()
+    start_request_spans()
+    # ?profile=1 samples this request's stacks and answers with the report
+    # instead of the response; admin only, since it slows the request down
+    if request.args.get('profile') == '1':
+        if not admin_authorized():
+            return jsonify({
+                'error': 'Forbidden',
+                'status': 'error'
+            }), 403
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def finish_instrumentation(response):
+    # Streamed bodies are still being produced at this point, so their
+    # latency (and profile) covers the handler up to the first byte
+    elapsed = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    REQUEST_LATENCY.observe(elapsed, route=route, method=request.method, status=str(response.status_code))
+
+    totals = {}
+    for name, duration in request_spans() or ():
+        totals[name] = totals.get(name, 0.0) + duration
+    timings = [f'{name};dur={duration * 1000:.2f}' for name, duration in totals.items()]
+    timings.append(f'total;dur={elapsed * 1000:.2f}')
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        response.close()
+        response = jsonify({
+            'elapsed_ms': elapsed * 1000,
+            'profile': profiler.report(),
+            'response_status': response.status_code,
+            'spans': [{'name': name, 'ms': duration * 1000} for name, duration in request_spans()],
+            'status': 'success'
+        })
+    response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+@app.teardown_request
+def stop_profiler(exc):
+    # after_request is skipped when the view raised
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/predict', methods=['POST'])
 def predict_salary():
@@ -15,23 +183,55 @@ def predict_salary():
         # Get the JSON data from the request
         data = request.json
         
-        # Create a DataFrame with the required features
-        features = pd.DataFrame({
-            "Age": [data.get("Age")],
-            "GP": [data.get("GP")],
-            "TRB": [data.get("TRB")],
-            "AST": [data.get("AST")],
-            "PTS": [data.get("PTS")],
-            "BLK": [data.get("BLK")],
-            "TS%": [data.get("TS%")]
-        })
+        # {"season": "23-24", "player": "..."} scores a player's stats from
+        # that season's table instead of stats given in the body
+        season = data.get('season') or request.args.get('season')
+        if data.get('player') is not None:
+            row = player_features(season, player_key(data['player']))
+        else:
+            row = feature_row(data)
         
-        # Make prediction
-        prediction = model.predict(features)
+        # Make prediction straight from the feature row - for the linear
+        # model this is seven multiply-adds, no array or DataFrame at all
+        handle = models.current()
+        with span('predict'):
+            prediction, _ = prediction_cache.get_or_compute(handle.version, row, handle.predictor.predict_row)
         
         # Return the prediction as JSON
+        result = {
+            'model_version': handle.version,
+            'predicted_salary': int(prediction),
+            'status': 'success'
+        }
+        if season:
+            result['season'] = seasons.resolve(season)
+        return jsonify(result)
+    except KeyError as e:
         return jsonify({
-            'predicted_salary': int(prediction[0]),
+            'error': e.args[0],
+            'status': 'error'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_salary_batch():
+    try:
+        # Validate the whole payload once and build a single feature matrix
+        features = feature_matrix(request.json)
+        
+        # One predict call for every player in the batch
+        handle = models.current()
+        with span('predict'):
+            predictions = handle.predictor.predict(features) if len(features) else np.empty(0)
+        
+        return jsonify({
+            'model_version': handle.version,
+            'predicted_salaries': predictions.astype(int).tolist(),
+            'count': len(predictions),
             'status': 'success'
         })
     except Exception as e:
@@ -40,69 +240,209 @@ def predict_salary():
             'status': 'error'
         }), 400
 
-@app.route('/analyze-players', methods=['GET'])
-def analyze_players():
+@app.route('/predict/projection', methods=['POST'])
+def predict_projection():
+    """
+    Contract projections over a what-if grid:
+
+        {"players": ["LeBron James", 1628983], "season": "24-25",
+         "years": 5, "scenarios": {"PTS": {"min": -5, "max": 5, "step": 1}}}
+
+    "features" (rows of model features, optionally with Salary) can be
+    given instead of "players". years is n (0..n) or a list of offsets.
+    projected_salary (and surplus in streamed rows) is only returned when
+    at least one player has a Salary.
+    """
     try:
-        # Read the CSV file
-        csv_path = 'nba_stats_24-25_new.csv'
-        
-        # Check if file exists
-        if not os.path.exists(csv_path):
-            return jsonify({
-                'error': f'CSV file not found at {csv_path}',
-                'status': 'error'
-            }), 404
-            
-        df = pd.read_csv(csv_path)
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        years = parse_years(data.get('years'))
+        deltas, varied = parse_scenarios(data.get('scenarios'))
+        # ?format=ndjson|csv or the Accept header streams the grid
+        fmt = export_format(request.args, request.accept_mimetypes)
         
-        # Check for required columns
-        required_features = ["Age", "GP", "TRB", "AST", "PTS", "BLK", "TS%"]
-        missing_columns = [col for col in required_features + ["Salary"] if col not in df.columns]
+        season = None
+        if 'features' in data:
+            base = feature_matrix(data['features'])
+            salary = payload_salaries(data['features'], len(base))
+            labels = list(range(len(base)))
+        elif isinstance(data.get('players'), list):
+            season = seasons.resolve(data.get('season') or request.args.get('season'))
+            if seasons.source_path(season) is None:
+                return season_not_found(season)
+            entry = seasons.get(season)
+            rows = []
+            for player in data['players']:
+                # Numeric ids are looked up by PLAYER_ID, anything else by name
+                found = seasons.find_player(entry, player_key(player))
+                if not len(found):
+                    raise KeyError(f'Player not found in season {season}: {player}')
+                rows.append(found[0])
+            selected = entry.roster.take(rows)
+            base = feature_matrix(selected[FEATURES].to_dict(orient='records'))
+            salary = pd.to_numeric(selected['Salary'], errors='coerce').to_numpy(dtype=np.float64) \
+                if 'Salary' in selected.columns else np.full(len(rows), np.nan)
+            labels = selected['PLAYER'].tolist() if 'PLAYER' in selected.columns else list(data['players'])
+        else:
+            raise ValueError('Expected "players" (names or ids) or "features" in the request body')
         
-        if missing_columns:
-            return jsonify({
-                'error': f'Missing required columns: {", ".join(missing_columns)}',
-                'status': 'error'
-            }), 400
-            
-        # Convert columns to numeric
-        for col in required_features + ["Salary"]:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-        # Drop rows with missing values
-        original_count = len(df)
-        df = df.dropna(subset=required_features + ["Salary"])
-        dropped_count = original_count - len(df)
+        grid = ProjectionGrid(base, salary, years, deltas, varied)
+        limit = projection_max_cells if fmt else projection_max_json_cells
+        if grid.cells > limit:
+            hint = '' if fmt else '; use ?format=ndjson or csv to stream larger grids'
+            raise ValueError(f'Grid has {grid.cells} cells, the limit is {limit}{hint}')
         
-        # Extract features for prediction
-        features = df[required_features]
+        handle = models.current()
+        if fmt:
+            # Long format, one row per (player, year, scenario), predicted
+            # and serialized a chunk of players at a time
+            chunks = iter_frames(fmt, grid.frames(handle.predictor, labels))
+            response = Response(stream_with_context(chunks), mimetype=FORMATS[fmt])
+            response.headers['X-Model-Version'] = handle.version
+            return response
         
-        # Make predictions for all players
-        predictions = model.predict(features)
+        # The whole tensor in one predict call
+        with span('predict'):
+            predicted = grid.predict(handle.predictor)
+        scenarios = [{name: float(row[FEATURES.index(name)]) for name in varied} for row in deltas]
+        result = {
+            'model_version': handle.version,
+            'players': labels,
+            'predicted_salary': json_ints(predicted),
+            'scenarios': scenarios,
+            'shape': list(grid.shape),
+            'status': 'success',
+            'years': years.tolist()
+        }
+        if grid.has_salary:
+            result['projected_salary'] = json_ints(grid.projected_salary())
+        if season:
+            result['season'] = season
+        return jsonify(result)
+    except KeyError as e:
+        return jsonify({
+            'error': e.args[0],
+            'status': 'error'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/predict/cache', methods=['GET'])
+def prediction_cache_stats():
+    return jsonify({
+        'cache': prediction_cache.stats(),
+        'status': 'success'
+    })
+
+def admin_authorized():
+    """Admin routes are disabled unless ADMIN_TOKEN is set"""
+    token = os.environ.get('ADMIN_TOKEN')
+    given = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(given.encode('utf-8'), token.encode('utf-8'))
+
+@app.route('/admin/model', methods=['GET', 'POST'])
+def admin_model():
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Forbidden',
+            'status': 'error'
+        }), 403
+    try:
+        if request.method == 'GET':
+            return jsonify({
+                'active': models.current().describe(),
+                'versions': models.versions(),
+                'status': 'success'
+            })
         
-        # Add predictions to the DataFrame
-        df['Predicted_Salary'] = predictions.astype(int)
+        # {"version": "<name>"} loads and checks the model before swapping
+        # it in; on failure the current model keeps serving
+        version = (request.json or {}).get('version')
+        if not version:
+            raise ValueError('Missing required field: version')
+        previous = models.current()
+        handle = models.activate(version)
+        return jsonify({
+            'active': handle.describe(),
+            'previous': previous.version,
+            'status': 'success'
+        })
+    except FileNotFoundError:
+        return jsonify({
+            'error': f'Unknown model version: {version}',
+            'status': 'error'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/analyze-players', methods=['GET', 'POST'])
+def analyze_players():
+    try:
+        season = seasons.resolve(request.args.get('season'))
         
-        # Determine if players are undervalued, overvalued, or fairly valued
-        # Apply the updated valuation logic
-        def get_valuation(row):
-            diff = abs(row['Predicted_Salary'] - row['Salary'])
-            if diff <= 5000000:  # Within $5M range
-                return 'Fair'
-            elif row['Predicted_Salary'] > row['Salary']:
-                return 'Undervalued'
-            else:
-                return 'Overvalued'
+        # Check if the season has a table to score
+        if seasons.source_path(season) is None:
+            return season_not_found(season)
         
-        # Apply the function to create the Valuation column
-        df['Valuation'] = df.apply(get_valuation, axis=1)
+        # Re-score in the background; a trigger that arrives while a run is
+        # in flight queues one more run, and later ones share that queued job
+        job, coalesced = analysis_jobs.submit(seasons.output_path(season), season=season,
+                                              full=bool(request.args.get('full')))
         
-        # Save the updated DataFrame back to CSV
-        df.to_csv(csv_path, index=False)
+        # ?wait=1 keeps the old blocking behaviour for scripts, for up to
+        # analysis_wait_timeout seconds; a run still going after that gets
+        # the usual 202 so the worker is not held
+        if request.args.get('wait'):
+            job = analysis_jobs.wait(job['job_id'], timeout=analysis_wait_timeout) or job
+            if job['state'] == 'failed':
+                return jsonify({
+                    'error': job.get('error'),
+                    'job': job,
+                    'status': 'error'
+                }), 400
+            if job['state'] == 'succeeded':
+                return jsonify({
+                    'job': job,
+                    'message': 'Analysis complete and CSV updated',
+                    'status': 'success'
+                })
         
+        response = jsonify({
+            'coalesced': coalesced,
+            'job': job,
+            'status': 'accepted'
+        })
+        response.status_code = 202
+        response.headers['Location'] = f"/analyze-players/jobs/{job['job_id']}"
+        return response
+    except Exception as e:
         return jsonify({
-            'status': 'success',
-            'message': 'Analysis complete and CSV updated'
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/analyze-players/changes', methods=['GET'])
+def analysis_changes():
+    try:
+        season = seasons.resolve(request.args.get('season'))
+        since = request.args.get('since') or '0'
+        if not since.isdigit():
+            raise ValueError(f'since must be a non-negative integer, got {since!r}')
+        since = int(since)
+        log = ChangeLog(seasons.output_path(season))
+        entries = log.since(since)
+        return jsonify({
+            'changes': entries,
+            'last_seq': entries[-1]['seq'] if entries else max(since, log.last_seq()),
+            'season': season,
+            'status': 'success'
         })
     except Exception as e:
         return jsonify({
@@ -110,28 +450,241 @@ def analyze_players():
             'status': 'error'
         }), 400
 
+@app.route('/analyze-players/jobs/<job_id>', methods=['GET'])
+def analysis_job_status(job_id):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': f'Unknown job: {job_id}',
+            'status': 'error'
+        }), 404
+    return jsonify({
+        'job': job,
+        'status': 'success'
+    })
+
 @app.route('/allplayers', methods=['GET'])
 def get_all_players():
     try:
-        # Read the CSV file
-        csv_path = 'nba_stats_24-25_new.csv'
+        season = seasons.resolve(request.args.get('season'))
+        
+        # Check if the season has a table
+        if seasons.source_path(season) is None:
+            return season_not_found(season)
+            
+        # Parsed frame and serialized body are cached until the file changes
+        entry = seasons.get(season)
+        
+        # ?format=ndjson|csv or an Accept header asking for them streams the
+        # rows instead of building one JSON document
+        fmt = export_format(request.args, request.accept_mimetypes)
+        
+        # Filtered/paged queries and exports get their own ETag derived from
+        # the dataset version, so they can be revalidated just as cheaply
+        if is_query(request.args) or fmt:
+            query_string = request.query_string.decode('utf-8')
+            etag = hashlib.sha1(f'{entry.etag}:{fmt}?{query_string}'.encode('utf-8')).hexdigest()
+        else:
+            etag = entry.etag
+        
+        # Unchanged clients get a 304 without any serialization work
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif fmt:
+            # Filters and sort run up front so bad parameters still get a
+            # 400; serialization happens chunk by chunk as the body is sent.
+            # A plain export walks the frame in file order without the indexes.
+            ids, columns = None, None
+            if is_query(request.args):
+                ids, columns = export_rows(entry.derived('index', PlayerIndex), request.args)
+            chunks = iter_export(fmt, entry.roster, ids, columns)
+            response = Response(stream_with_context(chunks), mimetype=FORMATS[fmt])
+            if fmt == 'csv':
+                response.headers['Content-Disposition'] = f'attachment; filename="nba_stats_{season}.csv"'
+        elif etag != entry.etag:
+            # Answer the query from the prebuilt team/valuation/sort indexes
+            index = entry.derived('index', PlayerIndex)
+            response = jsonify(run_query(index, request.args))
+        else:
+            response = Response(entry.body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/similar', methods=['GET', 'POST'])
+def similar_players():
+    """
+    Players closest to a player (or to given stats) on the model features.
+
+    GET  /similar?player=<name or id>&k=10&season=24-25
+    POST /similar {"players": [<name or id>, ...], "k": 10, "season": "24-25"}
+    POST /similar {"features": [{"Age": ..., ...}, ...], "k": 10}
+    """
+    try:
+        body = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+        if not isinstance(body, dict):
+            raise ValueError('Expected a JSON object')
+        season = seasons.resolve(body.get('season') or request.args.get('season'))
+        if seasons.source_path(season) is None:
+            return season_not_found(season)
+        k = neighbor_count(body.get('k', request.args.get('k', DEFAULT_NEIGHBORS)))
+
+        entry = seasons.get(season)
+        with span('similar_index'):
+            index = entry.derived('similar', SimilarityIndex)
+
+        if request.method == 'GET':
+            if not request.args.get('player'):
+                raise ValueError('Missing required parameter: player')
+            players = [request.args['player']]
+        elif 'features' in body:
+            players = None
+        elif isinstance(body.get('players'), list):
+            players = body['players']
+        else:
+            raise ValueError('Expected "players" (names or ids) or "features" in the request body')
+
+        if players is None:
+            # Arbitrary stat lines; nothing to exclude
+            features = feature_matrix(body['features'])
+            exclude = None
+            queries = [{'query': i} for i in range(len(features))]
+        else:
+            # Numeric ids are looked up by PLAYER_ID, anything else by name
+            rows = []
+            for player in players:
+                found = seasons.find_player(entry, player_key(player))
+                if not len(found):
+                    raise KeyError(f'Player not found in season {season}: {player}')
+                rows.append(found[0])
+            features = entry.roster.take(rows, FEATURES).apply(pd.to_numeric, errors='coerce') \
+                .to_numpy(dtype=np.float64, na_value=np.nan)
+            if np.isnan(features).any():
+                bad = players[int(np.flatnonzero(np.isnan(features).any(axis=1))[0])]
+                raise ValueError(f'Player has incomplete stats: {bad}')
+            exclude = np.asarray(rows)
+            queries = [{'player': player} for player in players]
+
+        with span('similar_query'):
+            ids, distances = index.query(features, k, exclude)
+        results = [dict(query, neighbors=index.neighbors(ids[i], distances[i]))
+                   for i, query in enumerate(queries)]
+
+        response = {'k': k, 'season': season, 'status': 'success'}
+        if request.method == 'GET':
+            response.update(player=players[0], neighbors=results[0]['neighbors'])
+        else:
+            response.update(count=len(results), results=results)
+        return jsonify(response)
+    except KeyError as e:
+        return jsonify({
+            'error': e.args[0],
+            'status': 'error'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+def team_aggregates(season):
+    """Aggregates for a season's current table, built once per file version"""
+    entry = seasons.get(season)
+    with span('team_aggregates'):
+        return entry.derived('teams', TeamAggregates)
+
+@app.route('/teams', methods=['GET'])
+def list_teams():
+    try:
+        season = seasons.resolve(request.args.get('season'))
+        if seasons.source_path(season) is None:
+            return season_not_found(season)
+        
+        # ?sort=-surplus ranks teams by any aggregate field
+        teams = team_aggregates(season).ranked(request.args.get('sort'))
+        return jsonify({
+            'count': len(teams),
+            'data': teams,
+            'season': season,
+            'status': 'success'
+        })
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/teams/<team>', methods=['GET'])
+def team_detail(team):
+    try:
+        season = seasons.resolve(request.args.get('season'))
+        if seasons.source_path(season) is None:
+            return season_not_found(season)
         
-        # Check if file exists
-        if not os.path.exists(csv_path):
+        # The roster comes precomputed with the aggregates
+        detail = team_aggregates(season).team(team)
+        if detail is None:
             return jsonify({
-                'error': f'CSV file not found at {csv_path}',
+                'error': f'Team not found in season {season}: {team}',
                 'status': 'error'
             }), 404
-            
-        df = pd.read_csv(csv_path)
-        
-        # Convert DataFrame to list of dictionaries for JSON response
-        players_data = df.to_dict(orient='records')
+        return jsonify({
+            'data': detail,
+            'season': season,
+            'status': 'success'
+        })
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/league/summary', methods=['GET'])
+def league_summary():
+    try:
+        season = seasons.resolve(request.args.get('season'))
+        if seasons.source_path(season) is None:
+            return season_not_found(season)
         
         return jsonify({
-            'status': 'success',
-            'data': players_data,
-            'count': len(players_data)
+            'data': team_aggregates(season).summary,
+            'season': season,
+            'status': 'success'
+        })
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/seasons', methods=['GET'])
+def list_seasons():
+    return jsonify({
+        'default': seasons.default_season,
+        'loaded': seasons.loaded_seasons(),
+        'seasons': seasons.seasons(),
+        'status': 'success'
+    })
+
+@app.route('/players/<player>/history', methods=['GET'])
+def player_history(player):
+    try:
+        # Numeric ids are looked up by PLAYER_ID, anything else by name
+        history = seasons.player_history(player_key(player))
+        if not history:
+            return jsonify({
+                'error': f'Player not found: {player}',
+                'status': 'error'
+            }), 404
+        return jsonify({
+            'count': len(history),
+            'data': history,
+            'player': history[-1].get('PLAYER', player),
+            'status': 'success'
         })
     except Exception as e:
         return jsonify({
@@ -139,56 +692,23 @@ def get_all_players():
             'status': 'error'
         }), 400
     
-def run_analysis():
+def run_analysis(season=None):
     """Function to run analysis outside of Flask context"""
     try:
-        # Similar code as analyze_players but doesn't use jsonify
-        csv_path = 'nba_stats_24-25_new.csv'
+        season = seasons.resolve(season)
         
-        if not os.path.exists(csv_path):
-            print(f"Error: CSV file not found at {csv_path}")
+        if seasons.source_path(season) is None:
+            print(f"Error: no data for season {season}")
             return False
-            
-        df = pd.read_csv(csv_path)
-        
-        required_features = ["Age", "GP", "TRB", "AST", "PTS", "BLK", "TS%"]
-        missing_columns = [col for col in required_features + ["Salary"] if col not in df.columns]
-        
-        if missing_columns:
-            print(f"Error: Missing required columns: {', '.join(missing_columns)}")
-            return False
-            
-        for col in required_features + ["Salary"]:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-        original_count = len(df)
-        df = df.dropna(subset=required_features + ["Salary"])
-        dropped_count = original_count - len(df)
-        
-        features = df[required_features]
-        predictions = model.predict(features)
-        df['Predicted_Salary'] = predictions.astype(int)
-        
-        # Apply the updated valuation logic
-        def get_valuation_data(row):
-            diff = abs(row['Predicted_Salary'] - row['Salary'])
-            
-            if diff <= 5000000:  # Within $5M range
-                valuation = 'Fair'
-            elif row['Predicted_Salary'] > row['Salary']:
-                valuation = 'Undervalued'
-            else:
-                valuation = 'Overvalued'
-            
-            # Return as a pandas Series with named fields
-            return pd.Series({'Diff': diff, 'Valuation': valuation})
-
-        # Apply the function to create both columns at once
-        df[['Diff', 'Valuation']] = df.apply(get_valuation_data, axis=1)
         
-        df.to_csv(csv_path, index=False)
+        # Same scoring and atomic publish as the background job, serialized
+        # against any worker that is analyzing the file right now
+        csv_path = seasons.output_path(season)
+        with file_lock(os.path.abspath(csv_path)):
+            result = analyze_season(csv_path, season)
         
-        print("Analysis complete and CSV updated")
+        print(f"Analysis complete ({result['rows']} players, {result['scored']} re-scored, "
+              f"{result['dropped']} dropped, {result['changes_count']} valuation changes)")
         return True
     except Exception as e:
         print(f"Error: {str(e)}")
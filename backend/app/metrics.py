@@ -0,0 +1,259 @@
+"""
+In-process metrics and timing spans, rendered in the Prometheus text format.
+
+    with span('predict'):
+        predictions = model.predict(X)
+
+Every span is recorded in the nba_stage_duration_seconds histogram. Spans
+inside a request are also collected for that request, where main.py turns
+them into a Server-Timing header and the ?profile=1 report. Metrics are
+per process; under gunicorn each worker reports its own series, labelled
+with its pid.
+"""
+import bisect
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # label key -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(key, [("le", _format_value(bound))])} '
+                             f'{cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {cumulative}')
+        return lines
+
+
+class Metrics:
+    """
+    Registry of counters and histograms. collect(func) adds a callable
+    returning (name, type, help, [(labels, value), ...]) tuples, for values
+    owned elsewhere (cache sizes, ...) that are read at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text):
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self, func):
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = ['# HELP nba_process_info Worker process serving these metrics',
+                 '# TYPE nba_process_info gauge',
+                 f'nba_process_info{{pid="{os.getpid()}"}} 1']
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for func in self._collectors:
+            for name, kind, help_text, samples in func():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(_label_key(labels))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+REQUEST_LATENCY = metrics.histogram('nba_http_request_duration_seconds',
+                                    'Request latency by route, method and status')
+STAGE_LATENCY = metrics.histogram('nba_stage_duration_seconds',
+                                  'Time spent in each named processing stage')
+DROPPED_ROWS = metrics.counter('nba_analysis_dropped_rows_total',
+                               'Rows dropped by analysis for missing or non-numeric inputs')
+SCORED_ROWS = metrics.counter('nba_analysis_scored_rows_total',
+                              'Rows re-predicted by analysis runs')
+ANALYSIS_RUNS = metrics.counter('nba_analysis_runs_total', 'Analysis runs by outcome')
+
+# Spans recorded during the current request, or None outside of one
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+
+def start_request_spans():
+    spans = []
+    _request_spans.set(spans)
+    return spans
+
+
+def request_spans():
+    return _request_spans.get()
+
+
+@contextlib.contextmanager
+def recording_spans():
+    """Collect the spans of a block of work (e.g. a background job) on their own"""
+    spans = []
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time a named stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads it watches every `interval` seconds
+    from a background thread. Watches the thread that started it plus any
+    thread whose name starts with one of thread_prefixes (e.g. the
+    analysis job a ?wait=1 request is waiting for).
+    """
+
+    def __init__(self, interval=0.001, thread_prefixes=('analysis-',), max_depth=64):
+        self.interval = interval
+        self.thread_prefixes = thread_prefixes
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks = _Tally()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _watched(self):
+        idents = {self._target}
+        for thread in threading.enumerate():
+            if thread.name.startswith(self.thread_prefixes):
+                idents.add(thread.ident)
+        return idents
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in self._watched():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def report(self, top=25):
+        """Most frequent stacks (root first, ';'-joined) and their share of samples"""
+        total = sum(self.stacks.values()) or 1
+        return {
+            'interval_s': self.interval,
+            'samples': self.samples,
+            'stacks': [{'stack': stack, 'count': count, 'share': count / total}
+                       for stack, count in self.stacks.most_common(top)]
+        }
@@ -0,0 +1,39 @@
+import re
+import unicodedata
+
+import pandas as pd
+
+# Generational suffixes dropped before matching ("Jaren Jackson Jr." and
+# "Jaren Jackson" are the same player)
+SUFFIX_PATTERN = r'\b(?:jr|sr|ii|iii|iv|v)\b'
+PUNCTUATION_PATTERN = r"[.,'`’]"
+SEPARATOR_PATTERN = r'[-_/]'
+
+
+def normalize_name(name):
+    """
+    Canonical form of a player name for joining across sources: accents
+    stripped, lower case, no punctuation or generational suffix
+    """
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    name = re.sub(PUNCTUATION_PATTERN, '', name)
+    name = re.sub(SEPARATOR_PATTERN, ' ', name)
+    name = re.sub(SUFFIX_PATTERN, ' ', name)
+    return ' '.join(name.split())
+
+
+def normalize_names(names):
+    """normalize_name over a whole Series using vectorized string operations"""
+    names = pd.Series(names, copy=False).fillna('').astype(str)
+    normalized = (names.str.normalize('NFKD')
+                  .str.encode('ascii', 'ignore')
+                  .str.decode('ascii')
+                  .str.lower()
+                  .str.replace(PUNCTUATION_PATTERN, '', regex=True)
+                  .str.replace(SEPARATOR_PATTERN, ' ', regex=True)
+                  .str.replace(SUFFIX_PATTERN, ' ', regex=True)
+                  .str.split()
+                  .str.join(' '))
+    return normalized
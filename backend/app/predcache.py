@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of single-row predictions keyed by the model
+    version and the feature values rounded to `decimals` places. Entries
+    older than `ttl` seconds (if set) count as misses. Seeing a new model
+    version clears the cache.
+
+    Callers predict on key_row(row) rather than row, so every input that
+    maps to a key gets the same answer no matter which one filled it.
+    """
+
+    def __init__(self, max_size=4096, decimals=4, ttl=None, clock=time.monotonic):
+        self.max_size = max_size
+        self.decimals = decimals
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def key_row(self, row):
+        return tuple(round(value, self.decimals) for value in row)
+
+    def get_or_compute(self, version, row, compute):
+        """
+        The cached prediction for (version, row), or compute(key_row(row))
+        stored under that key. Returns (prediction, hit).
+        """
+        if not self.enabled:
+            return compute(row), False
+
+        key_row = self.key_row(row)
+        key = (version, key_row)
+        with self._lock:
+            if version != self._version:
+                self._invalidate(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or self._clock() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, True
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # Computed outside the lock; two threads missing the same key both
+        # compute it, which is cheaper than serializing every miss
+        value = compute(key_row)
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (value, self._clock())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._invalidate(self._version)
+
+    def _invalidate(self, version):
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._version = version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'decimals': self.decimals,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'hits': self.hits,
+                'invalidations': self.invalidations,
+                'max_size': self.max_size,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'ttl': self.ttl,
+                'version': self._version
+            }
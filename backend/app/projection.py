@@ -0,0 +1,220 @@
+"""
+Multi-year contract projections and what-if grids.
+
+A grid is every player x year x scenario combination: each player's
+feature row is aged `year` seasons and shifted by a scenario's feature
+deltas (e.g. PTS -5..+5), then the whole (players, years, scenarios,
+features) tensor is built by broadcasting and predicted in a single call.
+Predictions are the model's value for the aged stats as they are: the model
+is trained on salaries already projected forward with adjust_salary, so
+growing them again would count the raise twice. Current salaries are
+carried forward with adjust_salary to give the projected salary each
+prediction is compared with.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURES
+
+# Salaries above this grow at SUPERSTAR_GROWTH a year, the rest at ROLE_GROWTH
+SUPERSTAR_SALARY = 15_000_000
+SUPERSTAR_GROWTH = 0.05
+ROLE_GROWTH = 0.15
+
+MAX_YEARS = 10
+MAX_SCENARIOS = 10000
+# Rows per streamed chunk; each chunk's players are predicted together
+PROJECTION_CHUNK_CELLS = 20000
+
+
+def adjust_salary(salary, years):
+    """
+    Project salaries `years` seasons forward: superstars (> $15M) grow 5%
+    a year, role players 15%. Works on scalars and arrays alike.
+    """
+    salary = np.asarray(salary, dtype=np.float64)
+    rate = np.where(salary > SUPERSTAR_SALARY, SUPERSTAR_GROWTH, ROLE_GROWTH)
+    return np.round(salary * (1 + rate) ** years, 2)
+
+
+def parse_years(value):
+    """
+    Year offsets to project: n -> 0..n, or an explicit list of offsets.
+    Returned sorted and without duplicates.
+    """
+    if value is None:
+        value = 5
+    if isinstance(value, list):
+        years = value
+    else:
+        try:
+            years = range(int(value) + 1)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid value for years: {value!r}')
+    try:
+        years = np.unique(np.asarray(list(years), dtype=np.int64))
+    except (TypeError, ValueError):
+        raise ValueError('years must be whole numbers')
+    if not len(years) or years[0] < 0 or years[-1] > MAX_YEARS:
+        raise ValueError(f'years must be between 0 and {MAX_YEARS}')
+    return years
+
+
+def _deltas(feature, spec):
+    if isinstance(spec, dict):
+        # {"min": -5, "max": 5, "step": 1}, both ends included
+        try:
+            low, high = float(spec['min']), float(spec['max'])
+            step = float(spec.get('step', 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Scenario range for {feature} needs numeric min, max and step')
+        if step <= 0 or high < low:
+            raise ValueError(f'Invalid scenario range for {feature}')
+        if (high - low) / step >= MAX_SCENARIOS:
+            raise ValueError(f'Scenario range for {feature} has too many steps')
+        return np.round(np.arange(low, high + step / 2, step), 6).tolist()
+    if isinstance(spec, list) and spec:
+        try:
+            return [float(delta) for delta in spec]
+        except (TypeError, ValueError):
+            raise ValueError(f'Scenario deltas for {feature} must be numeric')
+    raise ValueError(f'Scenario for {feature} must be a list of deltas or a min/max/step range')
+
+
+def parse_scenarios(spec):
+    """
+    The cartesian product of per-feature deltas, e.g. {"PTS": [-5, 0, 5],
+    "AST": {"min": -2, "max": 2, "step": 1}} -> 15 scenarios. Returns the
+    (n_scenarios, n_features) delta matrix and the varied features. No spec
+    is a single scenario with no change.
+    """
+    if not spec:
+        return np.zeros((1, len(FEATURES))), []
+    if not isinstance(spec, dict):
+        raise ValueError('scenarios must be an object mapping features to deltas')
+    unknown = [name for name in spec if name not in FEATURES]
+    if unknown:
+        raise ValueError(f'Unknown scenario features: {", ".join(unknown)}')
+
+    varied = [name for name in FEATURES if name in spec]
+    axes = [_deltas(name, spec[name]) for name in varied]
+    if np.prod([len(axis) for axis in axes]) > MAX_SCENARIOS:
+        raise ValueError(f'At most {MAX_SCENARIOS} scenarios per request')
+    combos = np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, len(varied))
+    deltas = np.zeros((len(combos), len(FEATURES)))
+    deltas[:, [FEATURES.index(name) for name in varied]] = combos
+    return deltas, varied
+
+
+def payload_salaries(payload, n):
+    """
+    Salaries given alongside the features of a batch payload (row or
+    columnar, as accepted by feature_matrix), NaN where absent
+    """
+    if isinstance(payload, dict) and 'players' in payload:
+        payload = payload['players']
+    if isinstance(payload, list):
+        values = [record.get('Salary') if isinstance(record, dict) else None for record in payload]
+    else:
+        values = payload.get('Salary') or [None] * n
+        if not isinstance(values, list) or len(values) != n:
+            raise ValueError('Salary must be a list with one value per player')
+    try:
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError('Salary must be numeric')
+
+
+class ProjectionGrid:
+    """
+    Players' base feature rows and salaries crossed with year offsets and
+    scenario deltas. base is (n_players, n_features); salary is
+    (n_players,) with NaN where unknown.
+    """
+
+    def __init__(self, base, salary, years, deltas, varied=()):
+        self.base = np.asarray(base, dtype=np.float64)
+        self.salary = np.asarray(salary, dtype=np.float64)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.deltas = np.asarray(deltas, dtype=np.float64)
+        self.varied = list(varied)
+
+        # Ageing is the only per-year change to the stats
+        self.ageing = np.zeros((len(self.years), len(FEATURES)))
+        self.ageing[:, FEATURES.index('Age')] = self.years
+
+    @property
+    def shape(self):
+        return len(self.base), len(self.years), len(self.deltas)
+
+    @property
+    def cells(self):
+        return int(np.prod(self.shape))
+
+    def features(self, start=0, stop=None):
+        """(players, years, scenarios, features) inputs for players start:stop"""
+        base = self.base[start:stop]
+        X = base[:, None, None, :] + self.ageing[None, :, None, :] + self.deltas[None, None, :, :]
+        # A scenario can push a stat below zero; no stat is negative
+        return np.maximum(X, 0.0, out=X)
+
+    def predict(self, predictor, start=0, stop=None):
+        """Predicted salary per (player, year, scenario)"""
+        X = self.features(start, stop)
+        n, years, scenarios, _ = X.shape
+        if not n:
+            return np.empty((0, years, scenarios))
+        predicted = np.asarray(predictor.predict(X.reshape(-1, len(FEATURES))))
+        return predicted.reshape(n, years, scenarios)
+
+    @property
+    def has_salary(self):
+        """False when no player has a salary, so there is nothing to project"""
+        return bool(len(self.salary)) and not np.isnan(self.salary).all()
+
+    def projected_salary(self, start=0, stop=None):
+        """Current salary carried forward, per (player, year)"""
+        return adjust_salary(self.salary[start:stop, None], self.years[None, :])
+
+    def frames(self, predictor, labels, chunk_cells=PROJECTION_CHUNK_CELLS):
+        """
+        The grid in long format, one row per (player, year, scenario), as
+        DataFrames of about chunk_cells rows. Each chunk of players is
+        predicted with one call. projected_salary and surplus are left out
+        when no player has a salary.
+        """
+        players, years, scenarios = self.shape
+        per_player = years * scenarios
+        step = max(1, chunk_cells // per_player)
+        for start in range(0, players, step):
+            stop = min(start + step, players)
+            predicted = self.predict(predictor, start, stop)
+            ids = np.arange(start, stop)
+            frame = {
+                'player': np.repeat(np.asarray(labels, dtype=object)[ids], per_player),
+                'year': np.tile(np.repeat(self.years, scenarios), stop - start),
+                'Age': (self.base[ids, FEATURES.index('Age')][:, None] + self.years[None, :])
+                .repeat(scenarios, axis=1).ravel(),
+            }
+            for name in self.varied:
+                frame[f'{name}_delta'] = np.tile(self.deltas[:, FEATURES.index(name)], (stop - start) * years)
+            frame['predicted_salary'] = predicted.ravel().round()
+            if self.has_salary:
+                projected = np.broadcast_to(self.projected_salary(start, stop)[:, :, None], predicted.shape)
+                frame['projected_salary'] = projected.ravel()
+                frame['surplus'] = (frame['predicted_salary'] - frame['projected_salary']).round(2)
+            yield pd.DataFrame(frame)
+
+
+def json_ints(values):
+    """Nested lists of ints, with None where the value is missing"""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    ints = np.where(missing, 0, np.round(values)).astype(np.int64)
+    if not missing.any():
+        return ints.tolist()
+    ints = ints.astype(object)
+    ints[missing] = None
+    return ints.tolist()
@@ -0,0 +1,207 @@
+import numpy as np
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Categorical columns that get a value -> row ids index
+CATEGORY_FILTERS = {'team': 'TEAM', 'valuation': 'Valuation'}
+
+# Numeric columns that get a precomputed sort order. min_<name>/max_<name>
+# range filters and sort=<name> / sort=-<name> use these orders; sort also
+# takes the column name itself (pts or PTS).
+RANGE_FILTERS = {
+    'pts': 'PTS',
+    'age': 'Age',
+    'salary': 'Salary',
+    'gp': 'GP',
+    'predicted_salary': 'Predicted_Salary',
+    'diff': 'Diff',
+}
+
+
+class PlayerIndex:
+    """
+    Read-only indexes over one loaded version of the player table (a
+    CompactRoster): row ids per team and valuation, and a stable sort order
+    (plus its inverse rank) per numeric column. Built once per DatasetEntry.
+    """
+
+    def __init__(self, roster):
+        self.roster = roster
+        self.n = len(roster)
+
+        self.categories = {}
+        for col in CATEGORY_FILTERS.values():
+            if col in roster.columns:
+                keys = roster[col].astype(str).str.lower()
+                groups = keys.groupby(keys.to_numpy(), sort=False).indices
+                self.categories[col] = {key: np.sort(ids) for key, ids in groups.items()}
+
+        self.orders = {}
+        self.sorted_values = {}
+        self.ranks = {}
+        self.valid_counts = {}
+        for col in RANGE_FILTERS.values():
+            if col in roster.columns:
+                values = roster[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                order = np.argsort(values, kind='stable')
+                rank = np.empty(self.n, dtype=np.int64)
+                rank[order] = np.arange(self.n)
+                self.orders[col] = order
+                self.sorted_values[col] = values[order]
+                self.ranks[col] = rank
+                # argsort puts NaN last; remember where they start so
+                # descending sorts can keep them last too
+                self.valid_counts[col] = int(np.count_nonzero(~np.isnan(values)))
+
+    def category_ids(self, col, values):
+        """Row ids whose col matches any of values (case-insensitive)"""
+        index = self.categories.get(col)
+        if index is None:
+            raise ValueError(f'Column {col} is not available for filtering')
+        found = [index[v.lower()] for v in values if v.lower() in index]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def range_ids(self, col, low=None, high=None):
+        """Row ids with low <= col <= high, read off the precomputed sort order"""
+        if col not in self.orders:
+            raise ValueError(f'Column {col} is not available for filtering')
+        values = self.sorted_values[col]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        stop = np.searchsorted(values, np.inf, side='right') if high is None \
+            else np.searchsorted(values, high, side='right')
+        return np.sort(self.orders[col][start:stop])
+
+    def sort_ids(self, ids, col, descending=False):
+        """Order a subset of row ids by col using the inverse rank array"""
+        if col not in self.ranks:
+            raise ValueError(f'Cannot sort by {col}')
+        valid = self.valid_counts[col]
+        if ids is None:
+            order = self.orders[col]
+            if descending:
+                order = np.concatenate([order[:valid][::-1], order[valid:]])
+            return order
+        ranks = self.ranks[col][ids]
+        if descending:
+            ranks = np.where(ranks < valid, -ranks, ranks)
+        return ids[np.argsort(ranks, kind='stable')]
+
+
+def is_query(args):
+    """
+    True when the request asks for anything other than the full table.
+    Empty parameters (?team=) are ignored by the query, so they don't count.
+    """
+    names = {'limit', 'offset', 'sort', 'fields', *CATEGORY_FILTERS}
+    for param in RANGE_FILTERS:
+        names.update((f'min_{param}', f'max_{param}'))
+    return any(args.get(name) for name in names)
+
+
+def _parse_number(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number, got {value!r}')
+
+
+def _parse_int(args, name, default, maximum=None):
+    value = args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer, got {value!r}')
+    if value < 0:
+        raise ValueError(f'{name} must not be negative')
+    return min(value, maximum) if maximum is not None else value
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def select_rows(index, args):
+    """
+    Row ids matching the filters in args, in the requested sort order, and
+    the columns to return. ids is None for the whole table in file order.
+    """
+    ids = None
+
+    def narrow(candidates):
+        nonlocal ids
+        ids = candidates if ids is None else np.intersect1d(ids, candidates, assume_unique=True)
+
+    for param, col in CATEGORY_FILTERS.items():
+        if args.get(param):
+            narrow(index.category_ids(col, _split(args[param])))
+
+    for param, col in RANGE_FILTERS.items():
+        low = _parse_number(args, f'min_{param}')
+        high = _parse_number(args, f'max_{param}')
+        if low is not None or high is not None:
+            narrow(index.range_ids(col, low, high))
+
+    sort = args.get('sort')
+    if sort:
+        descending = sort.startswith('-')
+        col = sort.lstrip('-+')
+        ids = index.sort_ids(ids, RANGE_FILTERS.get(col, col), descending)
+
+    columns = list(index.roster.columns)
+    if args.get('fields'):
+        columns = _split(args['fields'])
+        unknown = [col for col in columns if col not in index.roster.columns]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return ids, columns
+
+
+def export_rows(index, args):
+    """
+    Like select_rows, for streaming exports: limit and offset apply only
+    when given, with no upper bound on limit
+    """
+    ids, columns = select_rows(index, args)
+    if args.get('limit') or args.get('offset'):
+        if ids is None:
+            ids = np.arange(index.n)
+        offset = _parse_int(args, 'offset', 0)
+        limit = _parse_int(args, 'limit', len(ids))
+        ids = ids[offset:offset + limit]
+    return ids, columns
+
+
+def run_query(index, args):
+    """
+    Filter, sort, page and project the player table using the prebuilt
+    indexes. args is a mapping of query-string parameters.
+    """
+    ids, columns = select_rows(index, args)
+    if ids is None:
+        ids = np.arange(index.n)
+
+    total = len(ids)
+    limit = _parse_int(args, 'limit', DEFAULT_LIMIT, MAX_LIMIT)
+    offset = _parse_int(args, 'offset', 0)
+    page = ids[offset:offset + limit]
+
+    records = index.roster.records(page, columns)
+    next_offset = offset + len(page) if offset + len(page) < total else None
+
+    return {
+        'count': len(records),
+        'data': records,
+        'limit': limit,
+        'next_offset': next_offset,
+        'offset': offset,
+        'status': 'success',
+        'total': total
+    }
@@ -0,0 +1,173 @@
+"""
+Versioned model registry with atomic hot-swap.
+
+Every *.joblib file in the model directory is a version, named by its file
+stem and identified by the hash of its contents. The active version is
+recorded in a pointer file next to the models, so an activation made
+through one gunicorn worker is picked up by every other worker on its next
+request. Requests read current() once and use that handle throughout, so a
+swap never mixes two models within one response.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from joblib import load
+
+from features import FEATURES
+from inference import make_predictor
+
+MODEL_SUFFIX = '.joblib'
+POINTER_NAME = 'active_model.json'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelHandle:
+    """
+    A loaded model together with the version and hash it was loaded from.
+    predictor is the inference backend chosen for it when it was loaded.
+    """
+
+    def __init__(self, model, name, path, sha256):
+        self.model = model
+        self.predictor = make_predictor(model)
+        self.name = name
+        self.path = path
+        self.sha256 = sha256
+        self.loaded_at = time.time()
+
+    @property
+    def version(self):
+        """'<name>@<short hash>', reported with every prediction"""
+        return f'{self.name}@{self.sha256[:12]}'
+
+    def describe(self):
+        return {
+            'backend': self.predictor.backend,
+            'loaded_at': self.loaded_at,
+            'name': self.name,
+            'sha256': self.sha256,
+            'version': self.version
+        }
+
+
+def check_model(model):
+    """Raise ValueError unless model can serve predictions for FEATURES"""
+    if not hasattr(model, 'predict'):
+        raise ValueError(f'{type(model).__name__} has no predict method')
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None and list(names) != FEATURES:
+        raise ValueError(f'Model features {list(names)} do not match {FEATURES}')
+    prediction = np.asarray(model.predict(np.zeros((1, len(FEATURES)))))
+    if prediction.shape != (1,):
+        raise ValueError(f'Model returned predictions of shape {prediction.shape} for one row')
+
+
+class ModelRegistry:
+    """
+    Models in model_dir, with one of them active. The active model is
+    swapped by building the new handle completely and then replacing a
+    single reference, so in-flight requests finish on the model they
+    started with.
+    """
+
+    def __init__(self, model_dir, default_version, pointer_path=None):
+        self.model_dir = model_dir
+        self.default_version = default_version
+        self.pointer_path = pointer_path or os.path.join(model_dir, POINTER_NAME)
+        self._current = None
+        self._pointer_key = None
+        self._lock = threading.Lock()
+
+    def path_for(self, name):
+        if os.path.basename(name) != name or name.startswith('.'):
+            raise ValueError(f'Invalid model version: {name}')
+        return os.path.join(self.model_dir, name + MODEL_SUFFIX)
+
+    def versions(self):
+        """Every model version on disk, marking the active one"""
+        current = self.current()
+        versions = []
+        for file_name in sorted(os.listdir(self.model_dir)):
+            if not file_name.endswith(MODEL_SUFFIX):
+                continue
+            path = os.path.join(self.model_dir, file_name)
+            sha256 = file_hash(path)
+            versions.append({
+                'active': sha256 == current.sha256,
+                'name': file_name[:-len(MODEL_SUFFIX)],
+                'sha256': sha256,
+                'version': f'{file_name[:-len(MODEL_SUFFIX)]}@{sha256[:12]}'
+            })
+        return versions
+
+    def current(self):
+        """
+        The active ModelHandle. Costs an os.stat() of the pointer file
+        unless another worker activated a different version.
+        """
+        key = self._read_pointer_key()
+        handle = self._current
+        if handle is not None and key == self._pointer_key:
+            return handle
+
+        with self._lock:
+            if self._current is not None and key == self._pointer_key:
+                return self._current
+            pointer = self._read_pointer()
+            name = pointer.get('name', self.default_version)
+            if self._current is None or pointer.get('sha256') != self._current.sha256:
+                self._current = self._load(name)
+            self._pointer_key = key
+            return self._current
+
+    def activate(self, name):
+        """
+        Load and check version `name`, make it active in this process and
+        publish it through the pointer file for the other workers. If the
+        model fails to load or check, the previous one stays active.
+        """
+        handle = self._load(name)
+        with self._lock:
+            self._write_pointer({'name': handle.name, 'sha256': handle.sha256})
+            self._current = handle
+            self._pointer_key = self._read_pointer_key()
+        return handle
+
+    def _load(self, name):
+        path = self.path_for(name)
+        sha256 = file_hash(path)
+        model = load(path)
+        check_model(model)
+        return ModelHandle(model, name, path, sha256)
+
+    def _read_pointer_key(self):
+        try:
+            st = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_pointer(self):
+        try:
+            with open(self.pointer_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_pointer(self, pointer):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(self.pointer_path)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(pointer, f)
+        os.replace(tmp_path, self.pointer_path)
@@ -0,0 +1,201 @@
+"""
+Compact in-memory player tables.
+
+A loaded table is held column by column in the narrowest type that gives
+back exactly the values that were loaded:
+
+- low-cardinality strings (TEAM, Valuation) as small integer codes into
+  their distinct values, which are interned
+- other strings (PLAYER) packed into one UTF-8 buffer with offsets, the
+  way Arrow stores them, instead of one Python object per row
+- integers in the smallest of int8/int16/int32 that holds their range
+- whole-number floats without gaps (Salary, Diff, Age) the same way
+- other floats as float32 when rounding back to their decimal places
+  restores every value exactly (PTS to 0.1, TS% to 0.001), else float64
+
+Rows are decoded to ordinary pandas/NumPy values a chunk at a time
+when served (take, records), so nothing ever sees the compact types and
+no full-precision copy of the table is kept around.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Strings with at most this share of distinct values are stored as codes
+CATEGORY_MAX_SHARE = 0.5
+# Decimal places tried when looking for an exact float32 encoding
+MAX_DECIMALS = 6
+
+_INT_TYPES = (np.int8, np.int16, np.int32)
+
+
+def _smallest_int(low, high):
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+def _decimals(values):
+    """Fewest decimal places that represent every finite value, or None"""
+    finite = values[np.isfinite(values)]
+    for decimals in range(MAX_DECIMALS + 1):
+        if np.array_equal(np.round(finite, decimals), finite):
+            return decimals
+    return None
+
+
+class Column:
+    """One encoded column: kind, stored values and what is needed to decode"""
+
+    def __init__(self, kind, values, dtype=None, categories=None, decimals=None, text=None, missing=None):
+        self.kind = kind
+        self.values = values
+        self.dtype = dtype
+        self.categories = categories
+        self.decimals = decimals
+        # 'text' columns: values holds n + 1 offsets into the text buffer
+        self.text = text
+        self.missing = missing
+
+    @property
+    def nbytes(self):
+        size = self.values.nbytes
+        if self.kind == 'category':
+            size += self.categories.nbytes + sum(sys.getsizeof(value) for value in self.categories)
+        elif self.kind == 'text':
+            size += len(self.text) + (self.missing.nbytes if self.missing is not None else 0)
+        elif self.kind == 'object':
+            # Each distinct object is counted once, however many rows share it
+            size += sum(sys.getsizeof(value) for value in {id(v): v for v in self.values}.values())
+        return size
+
+    def decode(self, rows=slice(None)):
+        if self.kind == 'text':
+            starts = self.values[:-1][rows].tolist()
+            ends = self.values[1:][rows].tolist()
+            text = self.text
+            decoded = np.empty(len(starts), dtype=object)
+            decoded[:] = [text[start:end].decode('utf-8') for start, end in zip(starts, ends)]
+            if self.missing is not None:
+                decoded[self.missing[rows]] = np.nan
+            return decoded
+        values = self.values[rows]
+        if self.kind == 'category':
+            # Code -1 (missing) picks the trailing NaN
+            return self.categories[values]
+        if self.kind == 'float32':
+            return np.round(values.astype(np.float64), self.decimals)
+        if self.kind == 'int':
+            return values.astype(self.dtype)
+        return values
+
+
+def encode(series):
+    """The most compact exact Column for a Series"""
+    values = series.to_numpy()
+
+    if pd.api.types.is_bool_dtype(series):
+        return Column('raw', np.ascontiguousarray(values))
+
+    if pd.api.types.is_integer_dtype(series):
+        dtype = _smallest_int(values.min(), values.max()) if len(values) else np.int8
+        if dtype is not None:
+            return Column('int', values.astype(dtype), dtype=values.dtype)
+        return Column('raw', np.ascontiguousarray(values))
+
+    if pd.api.types.is_float_dtype(series):
+        values = values.astype(np.float64, copy=False)
+        finite = np.isfinite(values)
+        if finite.all() and np.array_equal(values, np.trunc(values)):
+            dtype = _smallest_int(values.min(), values.max()) if len(values) else np.int8
+            if dtype is not None:
+                return Column('int', values.astype(dtype), dtype=np.float64)
+        decimals = _decimals(values)
+        if decimals is not None:
+            compact = values.astype(np.float32)
+            decoded = np.round(compact.astype(np.float64), decimals)
+            if np.array_equal(decoded, values, equal_nan=True):
+                return Column('float32', compact, decimals=decimals)
+        return Column('raw', np.ascontiguousarray(values))
+
+    # Strings and other objects
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = uniques.tolist()
+    if len(uniques) <= max(1, CATEGORY_MAX_SHARE * len(series)):
+        interned = [sys.intern(value) if isinstance(value, str) else value for value in uniques]
+        categories = np.array(interned + [np.nan], dtype=object)
+        dtype = _smallest_int(-1, len(uniques))
+        return Column('category', codes.astype(dtype), categories=categories)
+    if pd.api.types.infer_dtype(uniques, skipna=True) != 'string':
+        return Column('object', np.asarray(uniques + [np.nan], dtype=object)[codes])
+
+    # Mostly distinct strings: one UTF-8 buffer, row i is text[offsets[i]:offsets[i + 1]]
+    encoded = [value.encode('utf-8') for value in uniques] + [b'']
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))[codes]
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] <= np.iinfo(np.int32).max:
+        offsets = offsets.astype(np.int32)
+    text = b''.join(map(encoded.__getitem__, codes.tolist()))
+    missing = codes < 0
+    return Column('text', offsets, text=text, missing=missing if missing.any() else None)
+
+
+class CompactRoster:
+    """
+    A player table in compact columns, with the read side of a DataFrame
+    that the indexes need: len(), .columns, roster[col] / roster[[cols]]
+    and take(rows, columns), all returning decoded pandas objects.
+    """
+
+    def __init__(self, df):
+        self.columns = pd.Index(df.columns)
+        self.n = len(df)
+        self._columns = {name: encode(df[name]) for name in df.columns}
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(self._columns[key].decode(), name=key, copy=False)
+        return self.take(None, key)
+
+    def kinds(self):
+        """Column name -> storage kind, for inspection and the benchmarks"""
+        return {name: f'{column.kind}:{column.values.dtype}' for name, column in self._columns.items()}
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def take(self, rows=None, columns=None):
+        """
+        Decoded DataFrame of rows (positions, or a slice; None for all) and
+        columns, indexed by row position like df.iloc[rows][columns]
+        """
+        columns = list(self.columns) if columns is None else list(columns)
+        missing = [col for col in columns if col not in self._columns]
+        if missing:
+            raise KeyError(f'Unknown columns: {", ".join(map(str, missing))}')
+        if rows is None:
+            rows = slice(None)
+        if isinstance(rows, slice):
+            index = pd.RangeIndex(self.n)[rows]
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            index = pd.Index(rows)
+        data = {col: self._columns[col].decode(rows) for col in columns}
+        return pd.DataFrame(data, index=index, columns=columns, copy=False)
+
+    def records(self, rows=None, columns=None):
+        """take() as a list of dicts, with None for missing values so they serialize as null"""
+        frame = self.take(rows, columns)
+        missing = frame.isna()
+        gaps = missing.columns[missing.any().to_numpy()]
+        if len(gaps):
+            frame[gaps] = frame[gaps].astype(object).where(~missing[gaps], None)
+        return frame.to_dict(orient='records')
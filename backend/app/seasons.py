@@ -0,0 +1,235 @@
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset import DatasetCache
+from names import normalize_name, normalize_names
+from storage import read_table
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Season tables are named nba_stats_<yy-yy>.csv (raw) or
+# nba_stats_<yy-yy>_new.csv (scored by the analysis)
+SEASON_FILE_PATTERN = re.compile(r'^nba_stats_(\d{2}-\d{2})(_new)?\.csv$')
+
+# Older exports use different headers for the same columns
+COLUMN_ALIASES = {'Player Name': 'PLAYER', 'Team': 'TEAM'}
+
+HISTORY_COLUMNS = ['PLAYER', 'TEAM', 'Age', 'GP', 'PTS', 'TRB', 'AST', 'BLK', 'TS%',
+                   'Salary', 'Predicted_Salary', 'Diff', 'Valuation']
+
+
+def normalize_season(season):
+    """'2024-25' or '24-25' -> '24-25'"""
+    season = str(season).strip()
+    match = re.fullmatch(r'(?:\d{2})?(\d{2}-\d{2})', season)
+    if not match:
+        raise ValueError(f'Invalid season {season!r}, expected e.g. 24-25 or 2024-25')
+    return match.group(1)
+
+
+def load_season_table(path):
+    """Read a season partition and map its headers onto the current schema"""
+    df = read_table(path)
+    df = df.rename(columns={old: new for old, new in COLUMN_ALIASES.items() if old in df.columns})
+    return df.drop(columns=[col for col in df.columns if str(col).startswith('Unnamed')])
+
+
+def player_key(player):
+    """
+    Lookup key for a player given in a request: ints and digit strings are
+    PLAYER_IDs, anything else is a name
+    """
+    if isinstance(player, int) or str(player).isdigit():
+        return int(player)
+    return str(player)
+
+
+def _row_groups(values):
+    """Distinct value -> array of the row ids holding it"""
+    return pd.Series(np.arange(len(values))).groupby(values, sort=False).indices
+
+
+class PlayerKeys:
+    """Per-partition lookup from PLAYER_ID and normalized name to row ids"""
+
+    def __init__(self, roster):
+        self.names = normalize_names(roster['PLAYER']).to_numpy() if 'PLAYER' in roster.columns else None
+        self.by_name = _row_groups(self.names) if self.names is not None else {}
+        self.by_id = _row_groups(roster['PLAYER_ID'].to_numpy()) if 'PLAYER_ID' in roster.columns else {}
+
+
+class PlayerDirectory:
+    """
+    Catalog-wide lookup from PLAYER_ID and normalized name to the seasons
+    (and rows) a player appears in. A partition's keys are read once per
+    version (mtime, size) of its file, straight from the table rather than
+    through the partition cache, so a lookup only loads the partitions that
+    actually hold the player and never evicts the others.
+    """
+
+    def __init__(self, loader=load_season_table):
+        self._loader = loader
+        # season -> (path, file key, PlayerKeys)
+        self._partitions = {}
+        self.by_id = {}
+        self.by_name = {}
+        # PLAYER_ID -> normalized names it appears under
+        self.id_names = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, sources):
+        """Bring the lookup up to date with sources, {season: table path}"""
+        current = {}
+        for season, path in sources.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            current[season] = (path, (stat.st_mtime_ns, stat.st_size))
+        with self._lock:
+            if {season: part[:2] for season, part in self._partitions.items()} == current:
+                return
+            partitions = {}
+            for season, (path, key) in current.items():
+                known = self._partitions.get(season)
+                if known is not None and known[:2] == (path, key):
+                    partitions[season] = known
+                else:
+                    partitions[season] = (path, key, PlayerKeys(self._loader(path)))
+            self._rebuild(partitions)
+
+    def _rebuild(self, partitions):
+        by_id, by_name, id_names = {}, {}, {}
+        for season in sorted(partitions):
+            keys = partitions[season][2]
+            for name, rows in keys.by_name.items():
+                by_name.setdefault(name, []).append((season, rows))
+            for player_id, rows in keys.by_id.items():
+                by_id.setdefault(player_id, []).append((season, rows))
+                if keys.names is not None:
+                    names = id_names.setdefault(player_id, [])
+                    if keys.names[rows[0]] not in names:
+                        names.append(keys.names[rows[0]])
+        self._partitions = partitions
+        self.by_id, self.by_name, self.id_names = by_id, by_name, id_names
+
+    def lookup(self, player):
+        """
+        [(season, file key, rows)] for a PLAYER_ID (int) or name (str),
+        oldest season first. An id also matches its names in partitions
+        without that id.
+        """
+        if isinstance(player, str):
+            found = dict(self.by_name.get(normalize_name(player), []))
+        else:
+            found = dict(self.by_id.get(player, []))
+            for name in self.id_names.get(player, []):
+                for season, rows in self.by_name.get(name, []):
+                    found.setdefault(season, rows)
+        partitions = self._partitions
+        return [(season, partitions[season][1], found[season]) for season in sorted(found)]
+
+
+class SeasonCatalog:
+    """
+    Seasons available on disk, each a lazily loaded partition. Partitions
+    are loaded on first access and the most recently used `max_loaded`
+    stay in memory.
+
+    A season's analysis output lives in output_dir as
+    nba_stats_<season>_new.csv; until one exists the raw table from any of
+    the data directories is served.
+    """
+
+    def __init__(self, data_dirs, output_dir=APP_DIR, max_loaded=3, default_season='24-25'):
+        self.data_dirs = list(data_dirs)
+        self.output_dir = output_dir
+        self.default_season = default_season
+        self.cache = DatasetCache(loader=load_season_table, max_entries=max_loaded)
+        self.players = PlayerDirectory()
+
+    def seasons(self):
+        """Sorted ids of every season with a table on disk"""
+        found = set()
+        for directory in [self.output_dir] + self.data_dirs:
+            try:
+                names = os.listdir(directory)
+            except FileNotFoundError:
+                continue
+            for name in names:
+                match = SEASON_FILE_PATTERN.match(name)
+                if match:
+                    found.add(match.group(1))
+        return sorted(found)
+
+    def resolve(self, season=None):
+        """Normalized season id; the default season when season is empty"""
+        return normalize_season(season) if season else self.default_season
+
+    def output_path(self, season=None):
+        return os.path.join(self.output_dir, f'nba_stats_{self.resolve(season)}_new.csv')
+
+    def source_path(self, season=None):
+        """The table to serve and score for season, or None if there is none"""
+        season = self.resolve(season)
+        output_path = self.output_path(season)
+        if os.path.exists(output_path):
+            return output_path
+        for directory in [self.output_dir] + self.data_dirs:
+            path = os.path.join(directory, f'nba_stats_{season}.csv')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, season=None):
+        """The loaded DatasetEntry for season; raises KeyError if unknown"""
+        path = self.source_path(season)
+        if path is None:
+            raise KeyError(f'No data for season {self.resolve(season)}')
+        return self.cache.get(path)
+
+    def loaded_seasons(self):
+        loaded = []
+        for path in self.cache.loaded():
+            match = SEASON_FILE_PATTERN.match(os.path.basename(path))
+            if match:
+                loaded.append(match.group(1))
+        return loaded
+
+    def find_player(self, entry, player):
+        """Row ids in one partition for a player id (int) or name (str)"""
+        keys = entry.derived('player_keys', PlayerKeys)
+        if isinstance(player, str):
+            return keys.by_name.get(normalize_name(player), [])
+        return keys.by_id.get(player, [])
+
+    def player_history(self, player):
+        """
+        A player's rows across every season, oldest first. player is a
+        PLAYER_ID or a name; ids are resolved to a name so partitions
+        without ids can still be searched. Only the partitions the
+        catalog-wide PlayerDirectory places the player in are loaded.
+        """
+        self.players.refresh({season: self.source_path(season) for season in self.seasons()})
+        history = []
+        for season, key, rows in self.players.lookup(player):
+            entry = self.get(season)
+            if entry.key != key:
+                # The file changed after the directory read it; look the
+                # player up in the version just loaded instead
+                rows = self.find_player(entry, player)
+                names = [] if len(rows) else self.players.id_names.get(player, [])
+                for name in names:
+                    rows = self.find_player(entry, name)
+                    if len(rows):
+                        break
+                if not len(rows):
+                    continue
+            columns = [col for col in HISTORY_COLUMNS if col in entry.roster.columns]
+            for record in entry.roster.records(rows, columns):
+                history.append({'season': season, **record})
+        return history
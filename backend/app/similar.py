@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from features import FEATURES
+
+DEFAULT_NEIGHBORS = 10
+MAX_NEIGHBORS = 100
+
+# Columns returned for each neighbor, when the table has them
+NEIGHBOR_COLUMNS = ['PLAYER', 'PLAYER_ID', 'TEAM', *FEATURES, 'Salary', 'Predicted_Salary', 'Diff',
+                    'Valuation']
+
+
+class SimilarityIndex:
+    """
+    KD-tree over one loaded version of the player table, on the model
+    features standardized to zero mean and unit variance so points and
+    TS% weigh the same. Rows missing any feature are left out. Built once
+    per DatasetEntry, so it is rebuilt only when the file changes.
+    """
+
+    def __init__(self, roster):
+        self.roster = roster
+        matrix = roster[FEATURES].apply(pd.to_numeric, errors='coerce') \
+            .to_numpy(dtype=np.float64, na_value=np.nan)
+        complete = ~np.isnan(matrix).any(axis=1)
+        # Index position -> row id in the roster
+        self.rows = np.flatnonzero(complete)
+        points = matrix[complete]
+
+        self.mean = points.mean(axis=0) if len(points) else np.zeros(len(FEATURES))
+        std = points.std(axis=0) if len(points) else np.ones(len(FEATURES))
+        # A constant feature carries no distance information
+        self.std = np.where(std > 0, std, 1.0)
+        self.tree = cKDTree(self.standardize(points)) if len(points) else None
+        self.columns = [col for col in NEIGHBOR_COLUMNS if col in roster.columns]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def standardize(self, features):
+        return (np.asarray(features, dtype=np.float64) - self.mean) / self.std
+
+    def query(self, features, k=DEFAULT_NEIGHBORS, exclude=None):
+        """
+        The k nearest rows to each feature row, as (row ids, distances)
+        arrays of shape (n_queries, k), nearest first. exclude optionally
+        gives a row id per query to leave out of its own results (the
+        player being compared); -1 excludes nothing. Queries with fewer
+        than k candidates are padded with row id -1.
+        """
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        n = len(features)
+        if self.tree is None or n == 0:
+            return np.full((n, k), -1, dtype=np.int64), np.full((n, k), np.inf)
+
+        # One extra neighbor so excluding the player still leaves k
+        fetch = min(k + (exclude is not None), len(self.rows))
+        distances, positions = self.tree.query(self.standardize(features), k=fetch)
+        distances = distances.reshape(n, fetch)
+        positions = positions.reshape(n, fetch)
+        ids = self.rows[positions]
+
+        if exclude is not None:
+            keep = ids != np.asarray(exclude).reshape(n, 1)
+            # Drop the excluded row where it was found, else the farthest
+            keep[keep.all(axis=1), -1] = False
+            ids = ids[keep].reshape(n, -1)
+            distances = distances[keep].reshape(n, -1)
+        ids, distances = ids[:, :k], distances[:, :k]
+        if ids.shape[1] < k:
+            pad = k - ids.shape[1]
+            ids = np.pad(ids, ((0, 0), (0, pad)), constant_values=-1)
+            distances = np.pad(distances, ((0, 0), (0, pad)), constant_values=np.inf)
+        return ids, distances
+
+    def neighbors(self, ids, distances):
+        """Records for one query's neighbors"""
+        found = ids >= 0
+        records = self.roster.records(ids[found], self.columns)
+        for record, distance in zip(records, distances[found]):
+            record['distance'] = round(float(distance), 4)
+        return records
+
+
+def neighbor_count(value):
+    """Validate a requested neighbor count"""
+    try:
+        k = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid value for k: {value!r}')
+    if not 1 <= k <= MAX_NEIGHBORS:
+        raise ValueError(f'k must be between 1 and {MAX_NEIGHBORS}')
+    return k
@@ -0,0 +1,220 @@
+"""
+Typed columnar snapshots for the player tables.
+
+Every table keeps a snapshot directory next to its CSV
+(nba_stats_24-25_new.csv -> nba_stats_24-25_new.csv.snapshot/) holding one
+.npy block per column dtype plus a meta.json describing the columns. Numeric columns are
+loaded memory-mapped, so reading a table costs no parsing or type
+inference; string columns are stored as category codes plus their distinct
+values.
+
+The CSV stays the import/export format: read_table() re-imports it when it
+was edited since the snapshot was taken (or no snapshot exists yet), and
+write_table() exports it alongside the new snapshot.
+"""
+import json
+import os
+import tempfile
+import uuid
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_SUFFIX = '.snapshot'
+FORMAT_VERSION = 1
+
+
+def snapshot_dir(csv_path):
+    return os.path.abspath(csv_path) + SNAPSHOT_SUFFIX
+
+
+def _csv_key(csv_path):
+    try:
+        stat = os.stat(csv_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _parse_key(csv_kwargs):
+    """The read_csv options a snapshot was parsed with; None for the defaults"""
+    return repr(sorted(csv_kwargs.items())) if csv_kwargs else None
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if meta.get('version') == FORMAT_VERSION else None
+
+
+def snapshot_is_fresh(csv_path, csv_kwargs=None):
+    """
+    True when the snapshot matches the CSV (or the CSV no longer exists)
+    and was parsed with the same read_csv options
+    """
+    meta = _read_meta(snapshot_dir(csv_path))
+    if meta is None or meta.get('parse') != _parse_key(csv_kwargs):
+        return False
+    key = _csv_key(csv_path)
+    return key is None or key == meta.get('csv')
+
+
+def write_snapshot(df, csv_path, csv_key=None, csv_kwargs=None):
+    """
+    Write df as the snapshot for csv_path. csv_key is the (mtime, size) of
+    the CSV df was read from, taken before reading it; by default the CSV
+    is stat'ed now. csv_kwargs are the read_csv options df was parsed with.
+    """
+    directory = snapshot_dir(csv_path)
+    os.makedirs(directory, exist_ok=True)
+    token = uuid.uuid4().hex[:12]
+
+    # Columns of the same dtype share one (n_columns, n_rows) block, so each
+    # column is a contiguous row of the block and a table is a handful of
+    # files however wide it is
+    blocks = {}
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        column = {'name': str(name)}
+
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy()
+            if values.dtype == object:
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            column['kind'] = 'numeric'
+        else:
+            # Strings and other objects: category codes plus distinct values
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            values = codes.astype(np.int32)
+            column['kind'] = 'category'
+            column['categories'] = [str(value) for value in categories]
+
+        block = blocks.setdefault(values.dtype.str, [])
+        column['block'] = f'{token}-{values.dtype.str.strip("<>|=")}.npy'
+        column['row'] = len(block)
+        block.append(values)
+        columns.append(column)
+
+    for dtype, arrays in blocks.items():
+        file_name = f'{token}-{dtype.strip("<>|=")}.npy'
+        data = np.stack(arrays) if arrays else np.empty((0, len(df)), dtype=dtype)
+        np.save(os.path.join(directory, file_name), data, allow_pickle=False)
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'csv': csv_key if csv_key is not None else _csv_key(csv_path),
+        'parse': _parse_key(csv_kwargs),
+        'rows': len(df),
+        'columns': columns
+    }
+
+    # Publish the new meta atomically, then drop block files it no longer
+    # references. Readers that already mapped the old files keep them alive.
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+    live = {column['block'] for column in columns} | {'meta.json'}
+    current = _read_meta(directory)
+    if current is not None:
+        # A concurrent writer may have published after us; keep its files
+        live |= {column['block'] for column in current['columns']}
+    for file_name in os.listdir(directory):
+        if file_name not in live and not file_name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except OSError:
+                pass
+    return meta
+
+
+def load_snapshot(csv_path, mmap=True):
+    """
+    Load the snapshot for csv_path. Numeric columns are memory-mapped
+    read-only when mmap is True; pass mmap=False for a frame that will be
+    modified in place.
+    """
+    directory = snapshot_dir(csv_path)
+    for attempt in range(2):
+        meta = _read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f'No snapshot for {csv_path}')
+        try:
+            blocks = {}
+            data = {}
+            for column in meta['columns']:
+                block = blocks.get(column['block'])
+                if block is None:
+                    block = np.load(os.path.join(directory, column['block']),
+                                    mmap_mode='r' if mmap else None, allow_pickle=False)
+                    # Plain ndarray view over the mapping, so pandas doesn't
+                    # carry the np.memmap subclass around
+                    block = blocks[column['block']] = np.asarray(block)
+                values = block[column['row']]
+                if column['kind'] == 'category':
+                    # Code -1 (missing) picks the trailing NaN
+                    lookup = np.array(column['categories'] + [np.nan], dtype=object)
+                    values = lookup[values]
+                data[column['name']] = values
+            return pd.DataFrame(data, columns=[c['name'] for c in meta['columns']], copy=False)
+        except FileNotFoundError:
+            # A writer replaced the snapshot between reading meta.json and
+            # opening its blocks; the new meta is complete, so read again
+            if attempt:
+                raise
+
+
+def read_table(csv_path, mmap=True, **csv_kwargs):
+    """
+    Read a player table, preferring its snapshot. The CSV is parsed (and a
+    new snapshot written) only when the CSV changed since the last snapshot
+    or the snapshot was parsed with different csv_kwargs.
+    """
+    if snapshot_is_fresh(csv_path, csv_kwargs):
+        try:
+            return load_snapshot(csv_path, mmap=mmap)
+        except FileNotFoundError:
+            pass
+
+    # Stat before parsing: if the CSV is replaced while it is being read,
+    # the snapshot is recorded against the old version and counts as stale
+    key = _csv_key(csv_path)
+    df = pd.read_csv(csv_path, **csv_kwargs)
+    try:
+        write_snapshot(df, csv_path, key, csv_kwargs)
+    except OSError:
+        # Read-only data directories still work, just without the speedup
+        pass
+    return df
+
+
+def write_table(df, csv_path, export_csv=True):
+    """
+    Save df as the table for csv_path: the CSV export is written to a temp
+    file and renamed into place, then the snapshot is updated to match it.
+    """
+    if export_csv:
+        directory = os.path.dirname(os.path.abspath(csv_path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(csv_path) + '.',
+                                        suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            # The rename keeps mtime and size, so this is the key of the
+            # CSV df was written to even if another writer replaces it next
+            key = _csv_key(tmp_path)
+            os.replace(tmp_path, csv_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return write_snapshot(df, csv_path, key)
+    return write_snapshot(df, csv_path)
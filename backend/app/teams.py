@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from valuation import LABELS
+
+# Per-team fields /teams can be sorted by
+TEAM_SORT_FIELDS = ['team', 'players', 'payroll', 'predicted_payroll', 'surplus', 'avg_age',
+                    'undervalued', 'fair', 'overvalued']
+
+ROSTER_COLUMNS = ['PLAYER', 'PLAYER_ID', 'Age', 'GP', 'PTS', 'Salary', 'Predicted_Salary', 'Surplus',
+                  'Valuation']
+
+# Teams listed at each end of the league summary's surplus ranking
+SUMMARY_TOP = 5
+
+
+def _number(value):
+    """JSON-safe scalar: NaN -> None, whole floats -> int"""
+    if value is None or pd.isna(value):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+class TeamAggregates:
+    """
+    Payroll against predicted value per team, aggregated once per loaded
+    version of the player table: payroll, total predicted salary, surplus
+    (predicted minus actual, positive when the roster is worth more than it
+    costs), valuation counts and each team's roster ordered by surplus.
+    Built once per DatasetEntry, so requests only read the results.
+
+    Tables that have not been analyzed yet only get payroll and counts.
+    """
+
+    def __init__(self, roster):
+        if 'TEAM' not in roster.columns:
+            raise ValueError('Column TEAM is not available for aggregation')
+        self.scored = 'Predicted_Salary' in roster.columns
+
+        frame = pd.DataFrame({
+            'TEAM': roster['TEAM'].astype('string').str.strip(),
+            'Salary': pd.to_numeric(roster['Salary'], errors='coerce') if 'Salary' in roster.columns else np.nan,
+            'Age': pd.to_numeric(roster['Age'], errors='coerce') if 'Age' in roster.columns else np.nan,
+        })
+        if self.scored:
+            frame['Predicted_Salary'] = pd.to_numeric(roster['Predicted_Salary'], errors='coerce')
+            frame['Surplus'] = frame['Predicted_Salary'] - frame['Salary']
+        frame = frame[frame['TEAM'].notna() & (frame['TEAM'] != '')]
+
+        grouped = frame.groupby('TEAM', sort=True)
+        totals = pd.DataFrame({
+            'players': grouped.size(),
+            'payroll': grouped['Salary'].sum(min_count=1),
+            'avg_age': grouped['Age'].mean(),
+        })
+        if self.scored:
+            totals['predicted_payroll'] = grouped['Predicted_Salary'].sum(min_count=1)
+            totals['surplus'] = grouped['Surplus'].sum(min_count=1)
+        if 'Valuation' in roster.columns:
+            counts = pd.crosstab(frame['TEAM'], roster['Valuation'].loc[frame.index]) \
+                .reindex(index=totals.index, columns=list(LABELS), fill_value=0)
+            for label in LABELS:
+                totals[label.lower()] = counts[label]
+
+        self.teams = {}
+        for team, row in totals.iterrows():
+            record = {'team': team}
+            record.update({name: _number(value) for name, value in row.items()})
+            self.teams[team.upper()] = record
+
+        # Rosters, most surplus value first
+        columns = [col for col in ROSTER_COLUMNS if col in roster.columns]
+        roster_frame = roster.take(frame.index.to_numpy(), columns)
+        if self.scored:
+            roster_frame['Surplus'] = frame['Surplus']
+            roster_frame = roster_frame.sort_values('Surplus', ascending=False, kind='stable')
+            columns = [col for col in ROSTER_COLUMNS if col in roster_frame.columns]
+        roster_frame = roster_frame.astype(object).where(roster_frame.notna(), None)
+        teams = frame['TEAM'].loc[roster_frame.index].str.upper()
+        self.rosters = {team: roster_frame.loc[ids, columns].to_dict(orient='records')
+                        for team, ids in roster_frame.groupby(teams.to_numpy(), sort=False).groups.items()}
+
+        self.summary = self._summarize(frame, totals)
+
+    def _summarize(self, frame, totals):
+        payroll = totals['payroll']
+        summary = {
+            'teams': len(totals),
+            'players': int(len(frame)),
+            'payroll': _number(frame['Salary'].sum(min_count=1)),
+            'avg_payroll': _number(payroll.mean()),
+            'median_payroll': _number(payroll.median()),
+            'max_payroll': _number(payroll.max()),
+            'min_payroll': _number(payroll.min()),
+            'avg_age': _number(frame['Age'].mean()),
+        }
+        if self.scored:
+            summary['predicted_payroll'] = _number(frame['Predicted_Salary'].sum(min_count=1))
+            summary['surplus'] = _number(frame['Surplus'].sum(min_count=1))
+            ranked = totals['surplus'].dropna().sort_values(ascending=False, kind='stable')
+            summary['most_undervalued_teams'] = [self.teams[team.upper()]
+                                                 for team in ranked.index[:SUMMARY_TOP]]
+            summary['most_overvalued_teams'] = [self.teams[team.upper()]
+                                                for team in ranked.index[::-1][:SUMMARY_TOP]]
+        for label in LABELS:
+            if label.lower() in totals.columns:
+                summary[label.lower()] = int(totals[label.lower()].sum())
+        return summary
+
+    def team(self, team):
+        """One team's aggregates plus its roster, or None for an unknown team"""
+        key = str(team).strip().upper()
+        record = self.teams.get(key)
+        if record is None:
+            return None
+        return dict(record, roster=self.rosters.get(key, []))
+
+    def ranked(self, sort=None):
+        """Every team's aggregates; sort is a field name, '-field' for descending"""
+        records = list(self.teams.values())
+        if not sort:
+            return records
+        field = sort.lstrip('-')
+        if field not in TEAM_SORT_FIELDS or (records and field not in records[0]):
+            raise ValueError(f'Cannot sort teams by {field}')
+        # Missing values last in either direction
+        present = [r for r in records if r[field] is not None]
+        missing = [r for r in records if r[field] is None]
+        return sorted(present, key=lambda r: r[field], reverse=sort.startswith('-')) + missing
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import analyze_incremental
+from changes import ChangeLog
+from features import FEATURES
+from storage import read_table, write_table
+
+BAND = 1_000_000
+
+
+class PointsModel:
+    """Predicts $1M per point and counts the rows it was asked to score"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return X[:, FEATURES.index('PTS')] * 1_000_000
+
+
+def players(**overrides):
+    df = pd.DataFrame({
+        'PLAYER_ID': [1, 2, 3],
+        'PLAYER': ['A', 'B', 'C'],
+        'Age': [25, 30, 22], 'GP': [70, 60, 50], 'TRB': [5.0, 6.0, 3.0], 'AST': [4.0, 2.0, 1.0],
+        'PTS': [20.0, 10.0, 5.0], 'BLK': [1.0, 0.5, 0.2], 'TS%': [0.6, 0.55, 0.5],
+        'Salary': [20e6, 20e6, 1e6],
+    })
+    for column, values in overrides.items():
+        df[column] = values
+    return df
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = str(tmp_path / 'nba_stats_24-25_new.csv')
+    write_table(players(), path)
+    return path
+
+
+def analyze(path, model, **kwargs):
+    return analyze_incremental(path, model, 'v1', band=BAND, **kwargs)
+
+
+def test_first_run_scores_everything(table):
+    model = PointsModel()
+    summary = analyze(table, model)
+
+    assert summary['first_run'] and summary['written']
+    assert (summary['scored'], summary['reused'], model.rows) == (3, 0, 3)
+    assert summary['added'] == summary['removed'] == summary['changes'] == []
+    assert read_table(table)['Valuation'].tolist() == ['Fair', 'Overvalued', 'Undervalued']
+
+
+def test_unchanged_table_is_not_rescored_or_rewritten(table):
+    analyze(table, PointsModel())
+    model = PointsModel()
+    summary = analyze(table, model)
+
+    assert not summary['first_run'] and not summary['written']
+    assert (summary['scored'], summary['reused'], model.rows) == (0, 3, 0)
+
+
+def test_added_removed_and_flipped_players_are_reported(table):
+    analyze(table, PointsModel())
+
+    # B's salary drops to what the model predicts (Overvalued -> Fair), C
+    # leaves and D arrives
+    df = players()
+    df.loc[1, 'Salary'] = 10e6
+    df = pd.concat([df.iloc[:2], players().iloc[[2]].assign(PLAYER_ID=4, PLAYER='D')], ignore_index=True)
+    write_table(df, table)
+
+    model = PointsModel()
+    summary = analyze(table, model)
+    assert (summary['scored'], summary['reused'], model.rows) == (2, 1, 2)
+    assert summary['added'] == ['4#0']
+    assert summary['removed'] == ['3#0']
+    assert [(c['player'], c['from'], c['to']) for c in summary['changes']] == [('B', 'Overvalued', 'Fair')]
+
+
+def test_scoring_version_change_rescores_every_row(table):
+    analyze(table, PointsModel())
+    model = PointsModel()
+    summary = analyze_incremental(table, model, 'v2', band=BAND)
+    assert summary['scored'] == model.rows == 3
+
+
+def test_full_rescores_every_row(table):
+    analyze(table, PointsModel())
+    assert analyze(table, PointsModel(), full=True)['scored'] == 3
+
+
+def test_rows_with_missing_inputs_are_dropped(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    write_table(players(PTS=[20.0, np.nan, 5.0]), path)
+    summary = analyze(path, PointsModel())
+    assert (summary['rows'], summary['dropped']) == (2, 1)
+
+
+def test_change_log_keeps_the_newest_entries_in_order(tmp_path):
+    log = ChangeLog(str(tmp_path / 'table.csv'), max_entries=2)
+    first = log.publish({'changes': ['1#0']})
+    log.publish({'changes': ['2#0']})
+    log.publish({'changes': ['3#0']})
+
+    assert [entry['changes'] for entry in log.since(first)] == [['2#0'], ['3#0']]
+    assert [entry['seq'] for entry in log.entries()] == [2, 3]
+    assert log.since(log.last_seq()) == []
@@ -0,0 +1,57 @@
+import threading
+
+from jobs import AnalysisJobs
+
+
+class BlockingAnalysis:
+    """Records each run's params and holds every run until released"""
+
+    def __init__(self):
+        self.runs = []
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+
+    def __call__(self, csv_path, **params):
+        self.runs.append(params)
+        self.started.release()
+        self.release.wait(5)
+        return {'params': params}
+
+
+def test_triggers_during_a_run_queue_one_follow_up(tmp_path):
+    analysis = BlockingAnalysis()
+    jobs = AnalysisJobs(str(tmp_path / 'jobs'), analysis)
+    path = str(tmp_path / 'table.csv')
+
+    running, coalesced = jobs.submit(path, full=False)
+    assert not coalesced
+    assert analysis.started.acquire(timeout=5)
+
+    queued, coalesced = jobs.submit(path, full=False)
+    assert not coalesced and queued['job_id'] != running['job_id']
+    again, coalesced = jobs.submit(path, full=True)
+    assert coalesced and again['job_id'] == queued['job_id']
+    assert jobs.get(queued['job_id'])['state'] == 'queued'
+
+    analysis.release.set()
+    assert jobs.wait(running['job_id'], timeout=5)['state'] == 'succeeded'
+    done = jobs.wait(queued['job_id'], timeout=5)
+    assert done['state'] == 'succeeded'
+    # The queued run keeps full=True from the trigger folded into it
+    assert analysis.runs == [{'full': False}, {'full': True}]
+
+
+def test_failed_runs_report_the_error(tmp_path):
+    def analysis(csv_path, **params):
+        raise ValueError('Missing required columns: Salary')
+
+    jobs = AnalysisJobs(str(tmp_path / 'jobs'), analysis)
+    job, _ = jobs.submit(str(tmp_path / 'table.csv'))
+    done = jobs.wait(job['job_id'], timeout=5)
+    assert done['state'] == 'failed' and 'Salary' in done['error']
+
+
+def test_unknown_and_malformed_job_ids(tmp_path):
+    jobs = AnalysisJobs(str(tmp_path / 'jobs'), lambda csv_path: {})
+    assert jobs.get('0' * 32) is None
+    assert jobs.get('../../etc/passwd') is None
@@ -0,0 +1,63 @@
+from predcache import PredictionCache
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, row):
+        self.calls += 1
+        return sum(row)
+
+
+def test_hits_for_rows_rounding_to_the_same_key():
+    cache, compute = PredictionCache(decimals=2), Counter()
+    assert cache.get_or_compute('v1', [1.0, 2.001], compute) == (3.0, False)
+    assert cache.get_or_compute('v1', [1.0, 2.004], compute) == (3.0, True)
+    assert compute.calls == 1
+
+
+def test_new_model_version_invalidates_every_entry():
+    cache, compute = PredictionCache(), Counter()
+    cache.get_or_compute('v1', [1.0], compute)
+    cache.get_or_compute('v1', [2.0], compute)
+
+    assert cache.get_or_compute('v2', [1.0], compute) == (1.0, False)
+    stats = cache.stats()
+    assert (stats['version'], stats['size'], stats['invalidations']) == ('v2', 1, 1)
+    # The old version's entries are gone, not just shadowed
+    assert cache.get_or_compute('v2', [2.0], compute) == (2.0, False)
+    assert compute.calls == 4
+
+
+def test_results_computed_for_a_replaced_version_are_not_stored():
+    cache = PredictionCache()
+
+    def compute_during_swap(row):
+        # Another request switches the model while this one computes
+        cache.get_or_compute('v2', [9.0], Counter())
+        return 1.0
+
+    cache.get_or_compute('v1', [1.0], compute_during_swap)
+    assert cache.stats()['size'] == 1
+    assert cache.get_or_compute('v2', [1.0], Counter())[1] is False
+
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    cache, compute = PredictionCache(max_size=2, ttl=10, clock=lambda: now[0]), Counter()
+    for value in (1.0, 2.0, 3.0):
+        cache.get_or_compute('v1', [value], compute)
+    assert cache.stats()['evictions'] == 1
+    assert cache.get_or_compute('v1', [1.0], compute)[1] is False
+
+    now[0] = 11.0
+    assert cache.get_or_compute('v1', [1.0], compute)[1] is False
+    assert cache.stats()['expirations'] == 1
+
+
+def test_disabled_cache_always_computes():
+    cache, compute = PredictionCache(max_size=0), Counter()
+    cache.get_or_compute('v1', [1.0], compute)
+    cache.get_or_compute('v1', [1.0], compute)
+    assert compute.calls == 2
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from query import MAX_LIMIT, PlayerIndex, is_query, run_query
+from roster import CompactRoster
+
+
+@pytest.fixture
+def index():
+    df = pd.DataFrame({
+        'PLAYER': ['A', 'B', 'C', 'D', 'E'],
+        'TEAM': ['LAL', 'BOS', 'lal', 'GSW', 'BOS'],
+        'Valuation': ['Fair', 'Overvalued', 'Undervalued', 'Fair', 'Fair'],
+        'PTS': [25.1, 12.0, np.nan, 30.4, 11.0],
+        'Salary': [40e6, 5e6, 1e6, 50e6, 2e6],
+    })
+    return PlayerIndex(CompactRoster(df))
+
+
+def players(result):
+    return [record['PLAYER'] for record in result['data']]
+
+
+def test_category_filters_are_case_insensitive(index):
+    assert players(run_query(index, {'team': 'lal'})) == ['A', 'C']
+    assert players(run_query(index, {'team': 'LAL,gsw', 'valuation': 'fair'})) == ['A', 'D']
+
+
+def test_range_filters_include_both_ends(index):
+    assert players(run_query(index, {'min_pts': '11', 'max_pts': '25.1'})) == ['A', 'B', 'E']
+    assert players(run_query(index, {'min_pts': '11.5'})) == ['A', 'B', 'D']
+
+
+def test_sort_keeps_missing_values_last(index):
+    assert players(run_query(index, {'sort': '-pts'})) == ['D', 'A', 'B', 'E', 'C']
+    assert players(run_query(index, {'sort': 'PTS'})) == ['E', 'B', 'A', 'D', 'C']
+
+
+def test_paging_and_fields(index):
+    result = run_query(index, {'sort': 'Salary', 'limit': '2', 'offset': '1', 'fields': 'PLAYER,Salary'})
+    assert result['data'] == [{'PLAYER': 'E', 'Salary': 2e6}, {'PLAYER': 'B', 'Salary': 5e6}]
+    assert (result['total'], result['next_offset']) == (5, 3)
+
+    last = run_query(index, {'offset': '4'})
+    assert players(last) == ['E'] and last['next_offset'] is None
+    assert run_query(index, {'limit': str(MAX_LIMIT * 10)})['limit'] == MAX_LIMIT
+
+
+def test_missing_values_are_none(index):
+    assert run_query(index, {'team': 'lal', 'fields': 'PTS'})['data'] == [{'PTS': 25.1}, {'PTS': None}]
+
+
+@pytest.mark.parametrize('args, message', [
+    ({'fields': 'PLAYER,Nope'}, 'Unknown fields: Nope'),
+    ({'min_pts': 'ten'}, 'min_pts must be a number'),
+    ({'limit': '-1'}, 'limit must not be negative'),
+    ({'offset': 'x'}, 'offset must be an integer'),
+    ({'sort': 'PLAYER'}, 'Cannot sort by PLAYER'),
+])
+def test_invalid_parameters(index, args, message):
+    with pytest.raises(ValueError, match=message):
+        run_query(index, args)
+
+
+def test_unavailable_filter_column():
+    index = PlayerIndex(CompactRoster(pd.DataFrame({'PLAYER': ['A'], 'PTS': [1.0]})))
+    with pytest.raises(ValueError, match='TEAM is not available'):
+        run_query(index, {'team': 'LAL'})
+
+
+def test_is_query_ignores_empty_parameters():
+    assert not is_query({})
+    assert not is_query({'team': '', 'limit': ''})
+    assert not is_query({'season': '24-25'})
+    assert is_query({'min_pts': '10'})
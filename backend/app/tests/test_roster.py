@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from roster import CompactRoster
+
+
+@pytest.fixture
+def df():
+    n = 50
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'PLAYER_ID': np.arange(1000, 1000 + n),
+        'PLAYER': [f'Player {i} Jr.' if i % 7 else 'Nikola Jokić' for i in range(n)],
+        'TEAM': rng.choice(['LAL', 'BOS', 'DEN'], n),
+        'Age': rng.integers(19, 40, n).astype(np.float64),
+        'PTS': np.round(rng.uniform(0, 35, n), 1),
+        'TS%': np.round(rng.uniform(0.4, 0.7, n), 3),
+        'Salary': np.where(np.arange(n) % 9 == 0, np.nan, np.round(rng.uniform(1e6, 5e7, n))),
+        'Ratio': rng.uniform(0, 1, n),
+        'Mixed': [None if i % 5 == 0 else (i if i % 2 else f's{i}') for i in range(n)],
+    })
+
+
+def expected(frame):
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def test_records_match_the_frame(df):
+    roster = CompactRoster(df)
+    assert roster.records() == expected(df)
+    assert roster.records(slice(5, 12), ['PLAYER', 'Salary']) == expected(df.iloc[5:12][['PLAYER', 'Salary']])
+    rows = [49, 0, 9, 9]
+    assert roster.records(rows) == expected(df.iloc[rows])
+
+
+def test_take_is_indexed_by_position(df):
+    roster = CompactRoster(df)
+    taken = roster.take([3, 1], ['PTS', 'TEAM'])
+    assert taken.index.tolist() == [3, 1]
+    pd.testing.assert_frame_equal(taken, df.iloc[[3, 1]][['PTS', 'TEAM']], check_dtype=False)
+    pd.testing.assert_series_equal(roster['PTS'], df['PTS'], check_dtype=False)
+
+
+def test_columns_are_stored_compactly(df):
+    roster = CompactRoster(df)
+    kinds = roster.kinds()
+    assert kinds['TEAM'].startswith('category')
+    assert kinds['PLAYER'].startswith('text')
+    assert kinds['Age'] == 'int:int8'
+    assert kinds['PTS'].startswith('float32')
+    # No exact float32 form for arbitrary floats
+    assert kinds['Ratio'] == 'raw:float64'
+    assert roster.nbytes < df.memory_usage(deep=True, index=False).sum()
+
+
+def test_unknown_columns(df):
+    with pytest.raises(KeyError, match='Nope'):
+        CompactRoster(df).take(None, ['PLAYER', 'Nope'])
+
+
+def test_empty_roster():
+    roster = CompactRoster(pd.DataFrame({'PLAYER': pd.Series([], dtype=object), 'PTS': pd.Series([], dtype=float)}))
+    assert len(roster) == 0 and roster.records() == []
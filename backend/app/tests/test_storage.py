@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import read_table, snapshot_dir, snapshot_is_fresh, write_table
+
+
+def table():
+    return pd.DataFrame({
+        'PLAYER': ['Luka Dončić', 'A', None],
+        'TEAM': ['DAL', 'LAL', 'LAL'],
+        'GP': [70, 12, 0],
+        'PTS': [28.1, np.nan, 0.0],
+        'Salary': [43031940.0, 1e6, np.nan],
+    })
+
+
+def test_round_trip_through_the_snapshot(tmp_path):
+    path = str(tmp_path / 'nba_stats_24-25.csv')
+    df = table()
+    write_table(df, path)
+
+    assert snapshot_is_fresh(path)
+    loaded = read_table(path)
+    pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+    # The CSV export parses to the same table
+    pd.testing.assert_frame_equal(pd.read_csv(path), df, check_dtype=False)
+
+
+def test_edited_csv_is_reimported(tmp_path):
+    path = str(tmp_path / 'nba_stats_24-25.csv')
+    write_table(table(), path)
+
+    edited = table()
+    edited.loc[0, 'PTS'] = 31.5
+    edited.to_csv(path, index=False)
+    os.utime(path, ns=(1, 1))
+
+    assert not snapshot_is_fresh(path)
+    assert read_table(path)['PTS'].iloc[0] == 31.5
+    # ...and the snapshot is brought up to date
+    assert snapshot_is_fresh(path)
+
+
+def test_parse_options_are_part_of_the_snapshot_key(tmp_path):
+    path = str(tmp_path / 'leaders.csv')
+    with open(path, 'w') as f:
+        f.write('// exported 2025-01-01\nPLAYER,PTS\nA,1.5\n')
+
+    assert read_table(path, skiprows=1).columns.tolist() == ['PLAYER', 'PTS']
+    assert read_table(path).columns.tolist() == ['// exported 2025-01-01']
+    assert read_table(path, skiprows=1).columns.tolist() == ['PLAYER', 'PTS']
+
+
+def test_csv_without_snapshot_directory_is_read(tmp_path):
+    path = str(tmp_path / 'plain.csv')
+    table().to_csv(path, index=False)
+    assert not os.path.exists(snapshot_dir(path))
+    pd.testing.assert_frame_equal(read_table(path), table(), check_dtype=False)
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+# Players whose predicted salary is within this many dollars of their actual
+# salary are 'Fair'. Set VALUATION_BAND_PCT (e.g. 0.15) to make the band a
+# fraction of each player's salary instead.
+VALUATION_BAND = float(os.environ.get('VALUATION_BAND', 5000000))
+VALUATION_BAND_PCT = os.environ.get('VALUATION_BAND_PCT')
+VALUATION_BAND_PCT = float(VALUATION_BAND_PCT) if VALUATION_BAND_PCT else None
+
+FAIR, UNDERVALUED, OVERVALUED = 0, 1, 2
+LABELS = np.array(['Fair', 'Undervalued', 'Overvalued'], dtype=object)
+
+
+def valuation_codes(predicted, salary, band=None, band_pct=None):
+    """
+    Classify every player at once.
+
+    Returns (diff, codes) where diff is |predicted - salary| and codes index
+    into LABELS. band_pct, when given, overrides the fixed dollar band.
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    salary = np.asarray(salary, dtype=np.float64)
+
+    if band_pct is None and band is None:
+        band_pct = VALUATION_BAND_PCT
+    if band_pct is not None:
+        band = np.abs(salary) * band_pct
+    elif band is None:
+        band = VALUATION_BAND
+
+    diff = np.abs(predicted - salary)
+    codes = np.where(predicted > salary, UNDERVALUED, OVERVALUED).astype(np.int8)
+    codes[diff <= band] = FAIR
+    return diff, codes
+
+
+def apply_valuation(df, band=None, band_pct=None):
+    """Add the Diff and Valuation columns to a scored players DataFrame in place"""
+    diff, codes = valuation_codes(df['Predicted_Salary'].to_numpy(),
+                                  df['Salary'].to_numpy(), band, band_pct)
+    df['Diff'] = diff
+    df['Valuation'] = LABELS[codes]
+    return df
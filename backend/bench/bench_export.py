@@ -0,0 +1,98 @@
+"""
+Time-to-first-byte and peak memory of /allplayers as one JSON document
+against the streaming NDJSON and CSV exports.
+
+Every measurement runs in a fresh process so peak RSS is not shared
+between modes. Run from the backend directory:
+    python bench/bench_export.py
+"""
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+APP_DIR = os.path.join(BACKEND_DIR, 'app')
+sys.path.insert(0, APP_DIR)
+
+from storage import write_table
+from synthetic import synthetic_roster
+
+SIZES = [10000, 100000, 1000000]
+
+MODES = {
+    'json': ('/allplayers', {}),
+    'ndjson': ('/allplayers', {'Accept': 'application/x-ndjson'}),
+    'csv': ('/allplayers?format=csv', {}),
+}
+
+
+def anon_rss_kb():
+    """
+    Resident anonymous memory. Pages of the memory-mapped snapshot that the
+    export reads count towards total RSS but are page cache, not heap.
+    """
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+    return 0
+
+
+def child(mode, data_dir):
+    """Run one request in this process and print its measurements as JSON"""
+    os.environ['DATA_DIR'] = data_dir
+    os.chdir(APP_DIR)
+    import main
+
+    # Load the table first so only the response itself is measured
+    main.seasons.get()
+    baseline = anon_rss_kb()
+
+    path, headers = MODES[mode]
+    client = main.app.test_client()
+    start = time.perf_counter()
+    response = client.get(path, headers=headers, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks)
+    ttfb = time.perf_counter() - start
+    size = len(first)
+    peak_anon = anon_rss_kb()
+    for chunk in chunks:
+        size += len(chunk)
+        peak_anon = max(peak_anon, anon_rss_kb())
+    total = time.perf_counter() - start
+    response.close()
+
+    print(json.dumps({'ttfb': ttfb, 'total': total, 'bytes': size, 'baseline_kb': baseline,
+                      'peak_anon_kb': peak_anon,
+                      'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='nba-export-bench-')
+    try:
+        print(f"{'rows':>8} {'mode':<7} {'TTFB ms':>9} {'total ms':>9} {'MB sent':>8} "
+              f"{'peak RSS MB':>12} {'heap growth MB':>15}")
+        for n in SIZES:
+            write_table(synthetic_roster(n, 'scored'), os.path.join(tmp_dir, 'nba_stats_24-25_new.csv'))
+            for mode in MODES:
+                out = subprocess.run([sys.executable, __file__, '--child', mode, tmp_dir],
+                                     capture_output=True, text=True, check=True)
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                growth = max(0, result['peak_anon_kb'] - result['baseline_kb'])
+                print(f"{n:>8} {mode:<7} {result['ttfb'] * 1000:>9.1f} {result['total'] * 1000:>9.1f} "
+                      f"{result['bytes'] / 1e6:>8.1f} {result['peak_kb'] / 1024:>12.1f} {growth / 1024:>15.1f}")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
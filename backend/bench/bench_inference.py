@@ -0,0 +1,75 @@
+"""
+Benchmark per-call prediction latency of the sklearn model against the
+exported linear coefficients.
+
+Run from the backend directory:
+    python bench/bench_inference.py
+"""
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from features import FEATURES
+from inference import LinearPredictor, check_rows, make_predictor
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'model',
+                          'linear_regression_model.joblib')
+
+BATCH_SIZES = [1000, 100000]
+
+
+def per_call(func, calls):
+    """Best-of-3 mean seconds per call over `calls` calls"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    model = load(MODEL_PATH)
+    predictor = make_predictor(model)
+    assert isinstance(predictor, LinearPredictor), 'model was not exported to coefficients'
+
+    # The export must agree with model.predict on every check row
+    X = check_rows(10000, seed=1)
+    expected = model.predict(X)
+    assert np.allclose(predictor.predict(X), expected, rtol=0, atol=1e-3)
+    assert (predictor.predict(X).astype(int) == expected.astype(int)).mean() > 0.999
+
+    row = X[1].tolist()
+    frame = pd.DataFrame([row], columns=FEATURES)
+    array = np.array([row])
+
+    print(f"{'single row':<32} {'us/call':>10}")
+    timings = [
+        ('sklearn, DataFrame', per_call(lambda: model.predict(frame), 2000)),
+        ('sklearn, ndarray', per_call(lambda: model.predict(array), 2000)),
+        ('linear, ndarray', per_call(lambda: predictor.predict(array), 20000)),
+        ('linear, pure Python', per_call(lambda: predictor.predict_row(row), 200000)),
+    ]
+    for name, seconds in timings:
+        print(f'{name:<32} {seconds * 1e6:>10.2f}')
+
+    print(f"\n{'rows':>10} {'sklearn ns/row':>16} {'linear ns/row':>15} {'speedup':>9}")
+    for n in BATCH_SIZES:
+        batch = check_rows(n - 1, seed=2)
+        sklearn_time = per_call(lambda: model.predict(batch), 20)
+        linear_time = per_call(lambda: predictor.predict(batch), 20)
+        print(f'{n:>10} {sklearn_time / n * 1e9:>16.1f} {linear_time / n * 1e9:>15.1f} '
+              f'{sklearn_time / linear_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Bytes per player of a loaded roster: the pandas frame as parsed from the
+CSV against the CompactRoster a DatasetEntry keeps, and the resident
+memory a worker gains from holding the table loaded from its snapshot as
+a plain frame against as a dataset cache entry. RSS counts file-backed
+pages too: the frame's numeric columns are memory-mapped from the
+snapshot, so they are resident without being anonymous.
+
+Every RSS measurement runs in a fresh process. Run from the backend
+directory:
+    python bench/bench_roster.py
+    python bench/bench_roster.py --sizes 500 100000
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+APP_DIR = os.path.join(BACKEND_DIR, 'app')
+sys.path.insert(0, APP_DIR)
+
+import pandas as pd
+
+from roster import CompactRoster
+from storage import write_table
+from synthetic import synthetic_roster
+
+SIZES = [500, 100000, 1000000]
+TABLE = 'nba_stats_24-25_new.csv'
+
+
+def rss_kb():
+    """Anonymous plus file-backed resident memory of this process"""
+    total = 0
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('RssAnon:', 'RssFile:')):
+                total += int(line.split()[1])
+    return total
+
+
+def child(mode, data_dir):
+    """Load the table one way and print the RSS it costs"""
+    from dataset import DatasetCache
+    from seasons import load_season_table
+
+    path = os.path.join(data_dir, TABLE)
+    gc.collect()
+    baseline = rss_kb()
+    if mode == 'frame':
+        held = load_season_table(path)
+        # Touch every column, as serving the table does
+        held.memory_usage(deep=True)
+        held.select_dtypes('number').sum()
+    else:
+        held = DatasetCache(load_season_table).get(path)
+    gc.collect()
+    print(json.dumps({'rss_kb': rss_kb() - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory per player of the loaded roster')
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'frame B/player':>15} {'compact B/player':>17} {'ratio':>6} "
+          f"{'frame RSS B/player':>19} {'entry RSS B/player':>19}")
+    tmp_dir = tempfile.mkdtemp(prefix='nba-roster-bench-')
+    try:
+        for n in args.sizes:
+            path = os.path.join(tmp_dir, TABLE)
+            write_table(synthetic_roster(n, 'scored'), path)
+
+            frame = pd.read_csv(path)
+            frame_bytes = frame.memory_usage(deep=True, index=False).sum()
+            compact_bytes = CompactRoster(frame).nbytes
+            del frame
+            gc.collect()
+
+            rss = {}
+            for mode in ('frame', 'entry'):
+                out = subprocess.run([sys.executable, __file__, '--child', mode, tmp_dir],
+                                     capture_output=True, text=True, check=True)
+                rss[mode] = json.loads(out.stdout.strip().splitlines()[-1])['rss_kb'] * 1024 / n
+            print(f"{n:>8} {frame_bytes / n:>15.1f} {compact_bytes / n:>17.1f} "
+                  f"{frame_bytes / compact_bytes:>6.2f} {rss['frame']:>19.1f} {rss['entry']:>19.1f}")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,75 @@
+"""
+Compare the indexed salary join against the old per-row str.contains scan
+at 1x, 10x and 100x the current roster size.
+
+Run from the backend directory:
+    python bench/bench_salary_join.py
+"""
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+STATS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'stats')
+sys.path.insert(0, STATS_DIR)
+
+from salaryjoin import join_salaries
+
+SCALES = [1, 10, 100]
+SALARY_COL = '2024/2025'
+
+# The old join is O(N x M); it is timed on this many stats rows and
+# extrapolated to the full table
+SCAN_SAMPLE_ROWS = 200
+
+
+def scaled(df, column, scale):
+    """Repeat df `scale` times with distinct player names per copy"""
+    if scale == 1:
+        return df.copy()
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        # Tag the first name so name initials (the fuzzy buckets) keep
+        # their real distribution
+        copy[column] = copy[column].astype(str).str.replace(r'^(\S+)', rf'\g<1>x{i}', regex=True)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def old_get_player_salary(player_name, salaries_df, salary_col):
+    """The per-row lookup previously used by salaryfetch.merge_stats_with_salaries"""
+    player_row = salaries_df[salaries_df['PLAYER'].str.contains(re.escape(player_name), case=False, na=False)]
+    if player_row.empty:
+        return None
+    return player_row[salary_col].values[0].replace('$', '').replace(',', '')
+
+
+def main():
+    stats = pd.read_csv(os.path.join(STATS_DIR, 'nba_player_stats_2024-25_leaders.csv'))
+    salaries = pd.read_csv(os.path.join(STATS_DIR, 'nba_salaries.csv'))
+
+    print(f"{'scale':>6} {'stats':>8} {'salaries':>9} {'scan s (est)':>13} "
+          f"{'indexed s':>10} {'speedup':>9} {'match rate':>11}")
+    for scale in SCALES:
+        stats_n = scaled(stats, 'PLAYER', scale)
+        salaries_n = scaled(salaries, 'PLAYER', scale)
+
+        sample = stats_n['PLAYER'].iloc[:SCAN_SAMPLE_ROWS]
+        start = time.perf_counter()
+        for name in sample:
+            old_get_player_salary(name, salaries_n, SALARY_COL)
+        scan_time = (time.perf_counter() - start) / len(sample) * len(stats_n)
+
+        start = time.perf_counter()
+        _, report = join_salaries(stats_n, salaries_n, SALARY_COL)
+        join_time = time.perf_counter() - start
+
+        print(f'{scale:>5}x {len(stats_n):>8} {len(salaries_n):>9} {scan_time:>13.2f} '
+              f'{join_time:>10.3f} {scan_time / join_time:>8.0f}x {report["match_rate"]:>10.1%}')
+
+
+if __name__ == '__main__':
+    main()
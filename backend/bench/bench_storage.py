@@ -0,0 +1,65 @@
+"""
+Compare table load time from CSV against the columnar snapshots.
+
+Run from the backend directory:
+    python bench/bench_storage.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'app'))
+
+from storage import read_table, write_snapshot
+
+SEASON_FILES = [
+    os.path.join('app', 'nba_stats_24-25.csv'),
+    os.path.join('model', 'nba_stats_23-24.csv'),
+    os.path.join('model', 'nba_stats_22-23.csv'),
+]
+
+REPEAT = 20
+
+
+def timed(func):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    # Work on copies so the snapshots don't land in the source tree
+    tmp_dir = tempfile.mkdtemp(prefix='nba-storage-bench-')
+    try:
+        print(f"{'file':<22} {'rows':>6} {'read_csv ms':>12} {'snapshot ms':>12} "
+              f"{'mmap ms':>9} {'speedup':>8}")
+        for source in SEASON_FILES:
+            path = os.path.join(tmp_dir, os.path.basename(source))
+            shutil.copy(os.path.join(BACKEND_DIR, source), path)
+
+            df = pd.read_csv(path)
+            write_snapshot(df, path)
+
+            # Both loaders must return the same table
+            loaded = read_table(path)
+            pd.testing.assert_frame_equal(df, loaded, check_dtype=False)
+
+            csv_ms = timed(lambda: pd.read_csv(path))
+            full_ms = timed(lambda: read_table(path, mmap=False))
+            mmap_ms = timed(lambda: read_table(path))
+            print(f'{os.path.basename(source):<22} {len(df):>6} {csv_ms:>12.2f} {full_ms:>12.2f} '
+                  f'{mmap_ms:>9.2f} {csv_ms / mmap_ms:>7.1f}x')
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark the vectorized valuation against the old row-wise df.apply.
+
+Run from the backend directory:
+    python bench/bench_valuation.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from valuation import apply_valuation
+
+SIZES = [500, 50000, 5000000]
+
+# df.apply takes minutes at 5M rows, so the row-wise baseline is timed on
+# at most this many rows and reported per row
+APPLY_MAX_ROWS = 50000
+
+
+def synthetic_players(n, seed=215):
+    """Random salaries and predictions in the same range as the real roster"""
+    rng = np.random.default_rng(seed)
+    salary = rng.uniform(1000000, 55000000, n).round()
+    predicted = (salary + rng.normal(0, 8000000, n)).astype(int)
+    return pd.DataFrame({'Salary': salary, 'Predicted_Salary': predicted})
+
+
+def get_valuation_data(row):
+    """The row-wise implementation previously used by run_analysis"""
+    diff = abs(row['Predicted_Salary'] - row['Salary'])
+    if diff <= 5000000:
+        valuation = 'Fair'
+    elif row['Predicted_Salary'] > row['Salary']:
+        valuation = 'Undervalued'
+    else:
+        valuation = 'Overvalued'
+    return pd.Series({'Diff': diff, 'Valuation': valuation})
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'rows':>10} {'apply ns/row':>14} {'vectorized ns/row':>18} {'speedup':>9}")
+    for n in SIZES:
+        df = synthetic_players(n)
+
+        apply_df = df.iloc[:APPLY_MAX_ROWS].copy()
+        apply_time = timed(lambda: apply_df.apply(get_valuation_data, axis=1), 1)
+        apply_per_row = apply_time / len(apply_df) * 1e9
+
+        vector_time = timed(lambda: apply_valuation(df.copy()), 3)
+        vector_per_row = vector_time / n * 1e9
+
+        # Both implementations must agree on every sampled row
+        expected = apply_df.apply(get_valuation_data, axis=1)
+        actual = apply_valuation(apply_df.copy())
+        assert (expected['Valuation'].to_numpy() == actual['Valuation'].to_numpy()).all()
+        assert np.allclose(expected['Diff'].to_numpy(dtype=float), actual['Diff'].to_numpy())
+
+        print(f'{n:>10} {apply_per_row:>14.1f} {vector_per_row:>18.1f} '
+              f'{apply_per_row / vector_per_row:>8.0f}x')
+
+
+if __name__ == '__main__':
+    main()
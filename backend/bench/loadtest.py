@@ -0,0 +1,274 @@
+"""
+Load test /predict, /allplayers and /analyze-players.
+
+Each synthetic roster size is written as the 24-25 raw table in a scratch
+data directory and analyzed once, then every scenario is driven at each
+concurrency level, either in-process through the Flask test client or over
+HTTP against a locally launched gunicorn (app/gunicorn.conf.py). Results
+(RPS and p50/p95/p99 latency per target, roster size, scenario and
+concurrency) are printed and written to a JSON file for comparing runs.
+
+Run from the backend directory:
+    python bench/loadtest.py
+    python bench/loadtest.py --target client gunicorn --sizes 500 100000 1000000 \\
+        --concurrency 1 8 32 --requests 500 --output results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+APP_DIR = os.path.join(BACKEND_DIR, 'app')
+sys.path.insert(0, APP_DIR)
+
+from features import FEATURES
+from storage import write_table
+from synthetic import synthetic_roster
+
+SEASON_FILE = 'nba_stats_24-25.csv'
+
+
+def predict_payloads(count, seed=7):
+    """Feature rows in the real value ranges, as JSON bodies"""
+    rng = np.random.default_rng(seed)
+    low = np.array([19, 1, 0, 0, 0, 0, 0.3])
+    high = np.array([42, 82, 15, 12, 36, 4, 0.8])
+    rows = rng.uniform(low, high, (count, len(FEATURES))).round(3)
+    return [json.dumps(dict(zip(FEATURES, row.tolist()))).encode('utf-8') for row in rows]
+
+
+# Scenario -> (method, path, body factory taking the request number).
+# /analyze-players waits for a full re-score so each request measures one.
+def scenarios(payloads):
+    return {
+        'predict': ('POST', '/predict', lambda i: payloads[i % len(payloads)]),
+        'allplayers': ('GET', '/allplayers', None),
+        'allplayers_query': ('GET', '/allplayers?team=LAL,BOS&min_pts=10&sort=-PTS&limit=50', None),
+        'allplayers_ndjson': ('GET', '/allplayers?format=ndjson', None),
+        'analyze': ('POST', '/analyze-players?wait=1&full=1', None),
+    }
+
+
+class ClientTarget:
+    """Requests through the Flask test client, one client per thread"""
+
+    name = 'client'
+
+    def __init__(self, data_dir):
+        os.environ['DATA_DIR'] = data_dir
+        os.environ['ANALYSIS_JOBS_DIR'] = os.path.join(data_dir, 'jobs')
+        os.chdir(APP_DIR)
+        import main
+        self.app = main.app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, content_type='application/json')
+        # Read the whole body, streamed or not
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """Requests over HTTP/1.1 keep-alive to a gunicorn started for the run"""
+
+    name = 'gunicorn'
+
+    def __init__(self, data_dir, workers=None, server_mode='wsgi'):
+        if shutil.which('gunicorn') is None:
+            raise RuntimeError('gunicorn is not installed')
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        env = dict(os.environ, DATA_DIR=data_dir, ANALYSIS_JOBS_DIR=os.path.join(data_dir, 'jobs'),
+                   BIND=f'127.0.0.1:{self.port}', SERVER_MODE=server_mode)
+        if workers:
+            env['WEB_CONCURRENCY'] = str(workers)
+        self.process = subprocess.Popen(['gunicorn', '--config', 'gunicorn.conf.py'], cwd=APP_DIR, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._local = threading.local()
+        self._wait_ready()
+
+    def _wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('gunicorn exited during startup')
+            try:
+                if self.request('GET', '/seasons', None) == 200:
+                    return
+            except OSError:
+                self._local.conn = None
+            time.sleep(0.2)
+        raise RuntimeError('gunicorn did not start')
+
+    def request(self, method, path, body):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=300)
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._local.conn = None
+            conn.close()
+            raise
+        return response.status
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def drive(target, method, path, body, requests, concurrency):
+    """Send `requests` requests from `concurrency` threads; returns stats"""
+    latencies = np.empty(requests)
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            status = target.request(method, path, body(i) if body else None)
+        except Exception:
+            status = 'error'
+        latencies[i] = time.perf_counter() - start
+        with lock:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 'error' or status >= 500:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        'requests': requests,
+        'elapsed_s': elapsed,
+        'rps': requests / elapsed,
+        'mean_ms': float(latencies.mean() * 1000),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(latencies.max() * 1000),
+        'errors': errors,
+        'statuses': statuses
+    }
+
+
+def prepare_roster(data_dir, size):
+    """Write a fresh raw table of `size` players and drop previous outputs"""
+    for name in os.listdir(data_dir):
+        if name.startswith('nba_stats_'):
+            path = os.path.join(data_dir, name)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    write_table(synthetic_roster(size, 'raw'), os.path.join(data_dir, SEASON_FILE))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the backend endpoints')
+    parser.add_argument('--target', nargs='+', default=['client'], choices=['client', 'gunicorn'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[500, 10000, 100000, 1000000])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--scenarios', nargs='+', help='default: all')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and level')
+    parser.add_argument('--heavy-requests', type=int, default=5,
+                        help='requests for full-table scenarios at 100k+ rows')
+    parser.add_argument('--workers', type=int, help='gunicorn workers (default: from gunicorn.conf.py)')
+    parser.add_argument('--server-mode', default='wsgi', choices=['wsgi', 'asgi'])
+    parser.add_argument('--output', help='results JSON (default: bench/results/loadtest-<time>.json)')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         time.strftime('loadtest-%Y%m%d-%H%M%S.json'))
+    all_scenarios = scenarios(predict_payloads(1000))
+    names = args.scenarios or list(all_scenarios)
+    unknown = [name for name in names if name not in all_scenarios]
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(unknown)}')
+
+    report = {
+        'started_at': time.time(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'results': []
+    }
+    print(f"{'target':<9} {'rows':>8} {'scenario':<18} {'conc':>5} {'rps':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+
+    data_dir = tempfile.mkdtemp(prefix='nba-loadtest-')
+    try:
+        for target_name in args.target:
+            # Targets share the scratch data directory; the test client
+            # imports the app once per process
+            if target_name == 'client':
+                target = ClientTarget(data_dir)
+            else:
+                target = GunicornTarget(data_dir, args.workers, args.server_mode)
+            try:
+                for size in args.sizes:
+                    prepare_roster(data_dir, size)
+                    # Score once so /allplayers serves the analyzed table
+                    target.request('POST', '/analyze-players?wait=1', None)
+                    for name in names:
+                        method, path, body = all_scenarios[name]
+                        heavy = name != 'predict' and name != 'allplayers_query' and size >= 100000
+                        requests = args.heavy_requests if heavy else args.requests
+                        for concurrency in args.concurrency:
+                            result = drive(target, method, path, body, requests, concurrency)
+                            result.update(target=target_name, rows=size, scenario=name,
+                                          concurrency=concurrency)
+                            report['results'].append(result)
+                            print(f"{target_name:<9} {size:>8} {name:<18} {concurrency:>5} "
+                                  f"{result['rps']:>9.1f} {result['p50_ms']:>9.2f} "
+                                  f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>7}")
+            finally:
+                target.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        report['finished_at'] = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Synthetic rosters of any size with the same columns as the real tables,
+for the benchmarks.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+SCHEMAS = {
+    # Raw season table as produced by the stats pipeline
+    'raw': os.path.join(APP_DIR, 'nba_stats_24-25.csv'),
+    # Scored table served by /allplayers
+    'scored': os.path.join(APP_DIR, 'nba_stats_24-25_new.csv'),
+}
+
+JITTER_COLUMNS = ['PTS', 'TRB', 'AST', 'BLK', 'GP', 'TS%', 'Salary']
+
+
+def synthetic_roster(n, schema='raw', seed=215):
+    """
+    n players sampled from the real table with jittered stats. Rows get
+    unique PLAYER_IDs and names so per-player indexes see n distinct
+    players.
+    """
+    base = pd.read_csv(SCHEMAS[schema])
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    for col in JITTER_COLUMNS:
+        if col in df.columns:
+            values = df[col] * rng.uniform(0.8, 1.2, n)
+            df[col] = values.round(0 if col in ('GP', 'Salary') else 3 if col == 'TS%' else 1)
+    if n > len(base):
+        suffix = pd.Series(np.arange(n)).astype(str)
+        df['PLAYER'] = df['PLAYER'].astype(str) + ' ' + suffix
+        if 'PLAYER_ID' in df.columns:
+            df['PLAYER_ID'] = np.arange(1, n + 1)
+    return df
@@ -0,0 +1,284 @@
+"""
+Train the salary model from the season tables.
+
+Reproduces build.ipynb as a script: every season's players with at least
+20 games are projected to the target season's salary scale with
+adjust_salary, combined, and split 75/25. Candidate regressors and their
+hyperparameters are compared by k-fold cross-validation on the training
+split, with every (candidate, fold) fit running in a process pool. The
+best candidate is refitted on the whole training split, scored on the
+held-out split and saved as a registry version next to a JSON file with
+its feature schema, parameters and metrics.
+
+    python train.py
+    python train.py --seasons 22-23 23-24 --target 24-25 --name salary-2025
+    python train.py --candidates linear ridge --folds 10 --activate
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import dump
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Features, season tables and the registry are shared with the app
+sys.path.insert(0, os.path.join(MODEL_DIR, '..', 'app'))
+from features import FEATURES
+from projection import adjust_salary
+from registry import MODEL_SUFFIX, ModelRegistry, file_hash
+from seasons import SEASON_FILE_PATTERN, load_season_table, normalize_season
+
+TARGET = 'Salary'
+MIN_GAMES = 20
+
+# Name -> (estimator class, hyperparameter grid)
+CANDIDATES = {
+    'linear': (LinearRegression, {}),
+    'ridge': (Ridge, {'alpha': [0.1, 1.0, 10.0, 100.0]}),
+    'lasso': (Lasso, {'alpha': [100.0, 1000.0, 10000.0], 'max_iter': [50000]}),
+    'random_forest': (RandomForestRegressor, {'n_estimators': [200], 'max_depth': [4, 8, None],
+                                              'min_samples_leaf': [1, 5], 'random_state': [0]}),
+    'gradient_boosting': (GradientBoostingRegressor, {'n_estimators': [200], 'max_depth': [2, 3],
+                                                      'learning_rate': [0.05, 0.1], 'random_state': [0]}),
+}
+
+
+def season_start(season):
+    """'23-24' -> 23"""
+    return int(normalize_season(season)[:2])
+
+
+def find_seasons(data_dirs):
+    """season -> raw table path for every nba_stats_<season>.csv in data_dirs"""
+    found = {}
+    for directory in data_dirs:
+        for name in sorted(os.listdir(directory)):
+            match = SEASON_FILE_PATTERN.match(name)
+            if match and not match.group(2):
+                found.setdefault(match.group(1), os.path.join(directory, name))
+    return found
+
+
+def season_frame(path, years_forward):
+    """One season's training rows with salaries projected years_forward"""
+    df = load_season_table(path)
+    missing = [col for col in FEATURES + [TARGET] if col not in df.columns]
+    if missing:
+        raise ValueError(f'{path} is missing columns: {", ".join(missing)}')
+    df = df[FEATURES + [TARGET]].apply(pd.to_numeric, errors='coerce')
+    df['TS%'] = df['TS%'].fillna(0)
+    df = df[(df['GP'] >= MIN_GAMES) & (df[TARGET] > 0)].dropna()
+    df[TARGET] = adjust_salary(df[TARGET].to_numpy(), years_forward)
+    return df
+
+
+def training_frame(season_paths, target_season):
+    target = season_start(target_season)
+    frames = []
+    for season, path in sorted(season_paths.items()):
+        years = target - season_start(season)
+        if years < 0:
+            raise ValueError(f'Season {season} is after the target season {target_season}')
+        frames.append(season_frame(path, years))
+    return pd.concat(frames, axis=0, ignore_index=True)
+
+
+def expand_grid(names):
+    """Every (candidate name, params) combination for the given candidates"""
+    configs = []
+    for name in names:
+        _, grid = CANDIDATES[name]
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            configs.append((name, dict(zip(keys, values))))
+    return configs
+
+
+def build(name, params):
+    estimator_class, _ = CANDIDATES[name]
+    return estimator_class(**params)
+
+
+def regression_metrics(y_true, y_pred):
+    return {
+        'mae': float(mean_absolute_error(y_true, y_pred)),
+        'r2': float(r2_score(y_true, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred)))
+    }
+
+
+def _fit_fold(task):
+    """Worker: fit one candidate on one fold and score it"""
+    config_id, name, params, X, y, train_idx, test_idx = task
+    model = build(name, params)
+    model.fit(X[train_idx], y[train_idx])
+    return config_id, regression_metrics(y[test_idx], model.predict(X[test_idx]))
+
+
+def cross_validate(configs, X, y, folds=5, workers=None, seed=512):
+    """
+    Score every config on the same k folds, running all (config, fold)
+    fits in a process pool. Returns one summary per config, best (lowest
+    mean RMSE) first.
+    """
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(X))
+    tasks = [(config_id, name, params, X, y, train_idx, test_idx)
+             for config_id, (name, params) in enumerate(configs)
+             for train_idx, test_idx in splits]
+
+    scores = {config_id: [] for config_id in range(len(configs))}
+    if workers == 1:
+        for config_id, metrics in map(_fit_fold, tasks):
+            scores[config_id].append(metrics)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for config_id, metrics in pool.map(_fit_fold, tasks, chunksize=max(1, len(tasks) // 32)):
+                scores[config_id].append(metrics)
+
+    summaries = []
+    for config_id, (name, params) in enumerate(configs):
+        fold_scores = scores[config_id]
+        summary = {'candidate': name, 'params': params}
+        for metric in ('mae', 'r2', 'rmse'):
+            values = np.array([s[metric] for s in fold_scores])
+            summary[metric] = float(values.mean())
+            summary[metric + '_std'] = float(values.std())
+        summaries.append(summary)
+    summaries.sort(key=lambda s: s['rmse'])
+    return summaries
+
+
+def _temp_file(model_dir, write):
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=model_dir)
+    with os.fdopen(fd, 'wb') as f:
+        write(f)
+    os.chmod(tmp_path, 0o644)
+    return tmp_path
+
+
+def save_model(model, name, model_dir, metadata):
+    """
+    Write <name>.joblib and <name>.json (metadata plus the model's sha256)
+    atomically. The model file is replaced last, so the registry never sees
+    a model without its metadata.
+    """
+    model_tmp = _temp_file(model_dir, lambda f: dump(model, f))
+    metadata = dict(metadata, sha256=file_hash(model_tmp))
+    meta_tmp = _temp_file(model_dir, lambda f: f.write(json.dumps(metadata, indent=2).encode('utf-8')))
+    os.replace(meta_tmp, os.path.join(model_dir, name + '.json'))
+    path = os.path.join(model_dir, name + MODEL_SUFFIX)
+    os.replace(model_tmp, path)
+    return path
+
+
+def train(season_paths, target_season, candidates=None, folds=5, workers=None,
+          test_size=0.25, seed=512):
+    """
+    Run the search and refit the best candidate. Returns (model, metadata).
+    """
+    df = training_frame(season_paths, target_season)
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURES], df[TARGET], test_size=test_size, random_state=seed)
+
+    configs = expand_grid(candidates or list(CANDIDATES))
+    start = time.perf_counter()
+    summaries = cross_validate(configs, X_train.to_numpy(), y_train.to_numpy(),
+                               folds=folds, workers=workers, seed=seed)
+    search_seconds = time.perf_counter() - start
+
+    # Fitted on the DataFrame so the model carries feature_names_in_, which
+    # the registry checks against FEATURES
+    best = summaries[0]
+    model = build(best['candidate'], best['params']).fit(X_train, y_train)
+
+    metadata = {
+        'candidate': best['candidate'],
+        'cv': summaries,
+        'features': FEATURES,
+        'folds': folds,
+        'metrics': {
+            'cv_rmse': best['rmse'],
+            'test': regression_metrics(y_test, model.predict(X_test)),
+            'train': regression_metrics(y_train, model.predict(X_train))
+        },
+        'params': best['params'],
+        'rows': {'test': len(X_test), 'total': len(df), 'train': len(X_train)},
+        'search_seconds': search_seconds,
+        'seasons': sorted(season_paths),
+        'sklearn_version': sklearn.__version__,
+        'target': TARGET,
+        'target_season': normalize_season(target_season),
+        'trained_at': time.time()
+    }
+    return model, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train and save the salary model')
+    parser.add_argument('--data-dir', nargs='*', default=[MODEL_DIR],
+                        help='directories searched for nba_stats_<season>.csv')
+    parser.add_argument('--seasons', nargs='*', help='seasons to train on (default: all found)')
+    parser.add_argument('--target', help='season salaries are projected to (default: after the latest)')
+    parser.add_argument('--candidates', nargs='*', choices=sorted(CANDIDATES))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, help='processes for the search (default: CPU count)')
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--name', help='model version name (default: model-<timestamp>)')
+    parser.add_argument('--activate', action='store_true',
+                        help='make the new model the active registry version')
+    args = parser.parse_args()
+
+    # The registry's load check predicts on a plain array
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    found = find_seasons(args.data_dir)
+    if args.seasons:
+        wanted = [normalize_season(season) for season in args.seasons]
+        unknown = [season for season in wanted if season not in found]
+        if unknown:
+            parser.error(f'No table for seasons: {", ".join(unknown)}')
+        found = {season: found[season] for season in wanted}
+    if not found:
+        parser.error('No season tables found')
+    target = args.target
+    if target is None:
+        latest = max(season_start(season) for season in found) + 1
+        target = f'{latest:02d}-{(latest + 1) % 100:02d}'
+
+    model, metadata = train(found, target, candidates=args.candidates,
+                            folds=args.folds, workers=args.workers)
+
+    print(f"Trained on {metadata['rows']['total']} players from {', '.join(metadata['seasons'])} "
+          f"(salaries projected to {metadata['target_season']}), "
+          f"{len(metadata['cv'])} configs x {args.folds} folds in {metadata['search_seconds']:.1f}s")
+    for summary in metadata['cv'][:5]:
+        print(f"  {summary['candidate']:<18} rmse {summary['rmse']:>12,.0f}  r2 {summary['r2']:.3f}  {summary['params']}")
+    test = metadata['metrics']['test']
+    print(f"Best: {metadata['candidate']} {metadata['params']}, "
+          f"test rmse {test['rmse']:,.0f}, r2 {test['r2']:.3f}")
+
+    name = args.name or time.strftime('model-%Y%m%d-%H%M%S')
+    path = save_model(model, name, args.model_dir, metadata)
+    print(f'Saved {path}')
+
+    if args.activate:
+        handle = ModelRegistry(args.model_dir, name).activate(name)
+        print(f'Activated {handle.version}')
+
+
+if __name__ == '__main__':
+    main()
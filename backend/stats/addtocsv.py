@@ -1,4 +1,9 @@
-import pandas as pd
+import os
+import sys
+
+# Shared table storage lives with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from storage import read_table, write_table
 
 # Create the player ID to age mapping dictionary
 player_ages_dict = {
@@ -103,13 +108,20 @@ player_ages_dict = {
     1630572: 25
 }
 
-# Read the CSV file
-csv_file = 'nba_player_stats_2024-25_leaders.csv'
-df = pd.read_csv(csv_file)
-
-# Add the Age column to the dataframe
-df['Age'] = df['PLAYER_ID'].map(player_ages_dict)
+def add_ages(df, ages=player_ages_dict):
+    """Return a copy of df with the Age column mapped from PLAYER_ID"""
+    df = df.copy()
+    df['Age'] = df['PLAYER_ID'].map(ages)
+    return df
 
-# Save the updated dataframe back to CSV
-df.to_csv(csv_file, index=False)
-print(f"Added Age column to the dataframe and saved to {csv_file}")
\ No newline at end of file
+if __name__ == "__main__":
+    # Read the CSV file
+    csv_file = 'nba_player_stats_2024-25_leaders.csv'
+    df = read_table(csv_file)
+    
+    # Add the Age column to the dataframe
+    df = add_ages(df)
+    
+    # Save the updated dataframe back to CSV
+    write_table(df, csv_file)
+    print(f"Added Age column to the dataframe and saved to {csv_file}")
@@ -1,35 +1,55 @@
-import pandas as pd
+import argparse
+import os
+import sys
 
-# File paths
-input_file = '/Users/jordianojr/Desktop/IS215-NBA/is215-nba/backend/stats/nba_stats_with_salaries.csv'
-output_file = '/Users/jordianojr/Desktop/IS215-NBA/is215-nba/backend/stats/nba_stats_with_per_game.csv'
+from derived import PER_GAME, compute_frame
 
-# Read the first line to check if it's a comment
-with open(input_file, 'r') as f:
-    first_line = f.readline()
+# Shared table storage lives with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from storage import read_table, write_snapshot, write_table
 
-# Read the CSV file
-if first_line.startswith('//'):
-    # Skip the comment line and read the data
-    data = pd.read_csv(input_file, skiprows=1)
-    comment_line = first_line
-else:
-    # No comment line, read the data normally
-    data = pd.read_csv(input_file)
-    comment_line = None
+STATS_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Calculate per-game statistics
-data['PTS'] = (data['PTS'] / data['GP']).round(1)
-data['REB'] = (data['REB'] / data['GP']).round(1)
-data['AST'] = (data['AST'] / data['GP']).round(1)
-data['BLK'] = (data['BLK'] / data['GP']).round(1)
+def per_game_stats(data):
+    """Return a copy of data with season totals converted to per-game averages"""
+    # Calculate per-game statistics (PTS_PG, ...) in one pass, then replace
+    # the totals with them; GP == 0 gives NaN instead of inf
+    data, _, _ = compute_frame(data, list(PER_GAME.values()), force=True)
+    for total, per_game in PER_GAME.items():
+        data[total] = data.pop(per_game)
+    return data
 
-# Save the modified data to a new CSV file
-if comment_line:
-    with open(output_file, 'w') as f:
-        f.write(comment_line)  # Write the comment line
-        data.to_csv(f, index=False)
-else:
-    data.to_csv(output_file, index=False)
+def main(input_file, output_file):
+    # Read the first line to check if it's a comment
+    with open(input_file, 'r') as f:
+        first_line = f.readline()
+    
+    # Read the CSV file
+    if first_line.startswith('//'):
+        # Skip the comment line and read the data
+        data = read_table(input_file, skiprows=1)
+        comment_line = first_line
+    else:
+        # No comment line, read the data normally
+        data = read_table(input_file)
+        comment_line = None
+    
+    data = per_game_stats(data)
+    
+    # Save the modified data to a new CSV file
+    if comment_line:
+        with open(output_file, 'w') as f:
+            f.write(comment_line)  # Write the comment line
+            data.to_csv(f, index=False)
+        write_snapshot(data, output_file)
+    else:
+        write_table(data, output_file)
+    
+    print(f"Per-game statistics have been calculated and saved to {output_file}")
 
-print(f"Per-game statistics have been calculated and saved to {output_file}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert season totals to per-game averages')
+    parser.add_argument('--input', default=os.path.join(STATS_DIR, 'nba_stats_with_salaries.csv'))
+    parser.add_argument('--output', default=os.path.join(STATS_DIR, 'nba_stats_with_per_game.csv'))
+    args = parser.parse_args()
+    main(args.input, args.output)
@@ -1,23 +1,28 @@
-import pandas as pd
+import argparse
+import os
 
-def add_true_shooting_percentage():
-    # File path
-    file_path = '/Users/jordianojr/Desktop/IS215-NBA/is215-nba/backend/stats/nba_player_stats_2024-25_leaders.csv'
-    
-    # Read the CSV file
-    df = pd.read_csv(file_path)
-    
-    # Calculate True Shooting Percentage (TS%)
-    # Formula: TS% = (Total Points) / (2 * (Total Field Goal Attempts + 0.44 * Total Free Throw Attempts))
-    df['TS%'] = df['PTS'] / (2 * (df['FGA'] + 0.44 * df['FTA']))
-    
-    # Round to 3 decimal places for better readability
-    df['TS%'] = df['TS%'].round(3)
-    
-    # Save the updated dataframe back to CSV
-    df.to_csv(file_path, index=False)
-    
-    print(f"TS% column added to {file_path}")
+from derived import compute_files, compute_frame
+
+STATS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def true_shooting_percentage(df):
+    """Return a copy of df with the TS% column added"""
+    # TS% = PTS / (2 * (FGA + 0.44 * FTA)), rounded to 3 decimals; players
+    # without attempts get NaN instead of a division by zero
+    df, _, _ = compute_frame(df, ['TS%'], force=True)
+    return df
+
+def add_true_shooting_percentage(paths):
+    # Every file is read and written once, in parallel, and skipped when
+    # its TS% is already up to date
+    for path, computed, _ in compute_files(paths, ['TS%']):
+        if computed:
+            print(f"TS% column added to {path}")
+        else:
+            print(f"TS% already up to date in {path}")
 
 if __name__ == "__main__":
-    add_true_shooting_percentage()
+    parser = argparse.ArgumentParser(description='Add TS% to season stats tables')
+    parser.add_argument('paths', nargs='*',
+                        default=[os.path.join(STATS_DIR, 'nba_player_stats_2024-25_leaders.csv')])
+    add_true_shooting_percentage(parser.parse_args().paths)
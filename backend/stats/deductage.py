@@ -1,23 +1,39 @@
-import pandas as pd
 import os
+import sys
 
-# Determine the location of the CSV file
-# Assuming it's in a data directory at the project root
-base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-csv_path = os.path.join(base_dir, "backend/stats/nba_player_stats_2023-24_leaders.csv")
+# Shared table storage lives with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from storage import read_table, write_table
 
-# Read the CSV file
-df = pd.read_csv(csv_path)
+def deduct_age(df, years=1):
+    """Return a copy of df with `years` deducted from every player's Age"""
+    # Verify Age column exists
+    if 'Age' not in df.columns:
+        raise KeyError("'Age' column not found")
+    df = df.copy()
+    df['Age'] = df['Age'] - years
+    return df
 
-# Verify Age column exists
-if 'Age' not in df.columns:
-    print("Error: 'Age' column not found in the CSV file.")
-    exit(1)
+def main():
+    # Determine the location of the CSV file
+    # Assuming it's in a data directory at the project root
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    csv_path = os.path.join(base_dir, "backend/stats/nba_player_stats_2023-24_leaders.csv")
+    
+    # Read the CSV file
+    df = read_table(csv_path)
+    
+    try:
+        # Deduct 1 from each row's age
+        df = deduct_age(df, 1)
+    except KeyError:
+        print("Error: 'Age' column not found in the CSV file.")
+        exit(1)
+    
+    # Save the modified data back to CSV
+    write_table(df, csv_path)
+    
+    print(f"Successfully deducted 1 year from each player's age in {csv_path}")
 
-# Deduct 1 from each row's age
-df['Age'] = df['Age'] - 1
-
-# Save the modified data back to CSV
-df.to_csv(csv_path, index=False)
-
-print(f"Successfully deducted 1 year from each player's age in {csv_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Derived stats as named, vectorized expressions.
+
+Each Metric declares the columns (or other metrics) it is computed from.
+compute_file() reads a season table once, evaluates every requested metric
+in dependency order and writes the table once. A metric whose column is
+already in the file and whose inputs and definition are unchanged since it
+was last written is skipped; the fingerprints that decide this are kept
+next to the table in <csv>.derived.json. Files are processed in parallel.
+
+    python derived.py nba_player_stats_2024-25_leaders.csv
+    python derived.py ../app/nba_stats_*.csv --metrics TS% PTS_PG --workers 4
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Shared table storage lives with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from storage import read_table, write_table
+
+
+def safe_divide(numerator, denominator):
+    """numerator / denominator, NaN wherever the denominator is zero or missing"""
+    numerator = pd.to_numeric(numerator, errors='coerce').astype('float64')
+    denominator = pd.to_numeric(denominator, errors='coerce').astype('float64')
+    return numerator / denominator.where(denominator != 0)
+
+
+class Metric:
+    """
+    A derived column. func receives one Series per input, in order, and
+    returns a Series. inputs name table columns or other metrics; bump
+    version when the definition changes in a way the code hash misses.
+    """
+
+    def __init__(self, name, func, inputs, version=1):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.version = version
+
+    def code_hash(self):
+        try:
+            source = inspect.getsource(self.func)
+        except (OSError, TypeError):
+            source = getattr(self.func, '__qualname__', repr(self.func))
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+METRICS = {}
+
+
+def metric(name, inputs, version=1):
+    """Register the decorated function as a metric"""
+    def register(func):
+        METRICS[name] = Metric(name, func, inputs, version)
+        return func
+    return register
+
+
+@metric('TSA', ['FGA', 'FTA'])
+def true_shooting_attempts(fga, fta):
+    return fga + 0.44 * fta
+
+
+@metric('TS%', ['PTS', 'TSA'])
+def true_shooting(pts, tsa):
+    # TS% = PTS / (2 * (FGA + 0.44 * FTA)); no attempts -> NaN
+    return safe_divide(pts, 2 * tsa).round(3)
+
+
+def _per_game(total, gp):
+    # Players without a game played have no per-game line
+    return safe_divide(total, gp).round(1)
+
+
+# Per-game averages of season totals, named <total>_PG
+PER_GAME = {total: f'{total}_PG' for total in ['PTS', 'REB', 'AST', 'BLK']}
+for _total, _name in PER_GAME.items():
+    metric(_name, [_total, 'GP'])(_per_game)
+
+
+def resolve(names, columns, metrics=None):
+    """
+    Every metric needed for names, dependencies first. Inputs that are
+    neither a metric nor one of columns raise a KeyError; with columns
+    None any non-metric input is taken to be a column.
+    """
+    metrics = METRICS if metrics is None else metrics
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in metrics:
+            if columns is None or name in columns:
+                return
+            raise KeyError(f'Unknown metric or missing column: {name}')
+        if name in visiting:
+            raise ValueError(f"Metric '{name}' depends on itself")
+        visiting.add(name)
+        for dep in metrics[name].inputs:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def source_columns(name, metrics=None):
+    """The table columns a metric is ultimately computed from"""
+    metrics = METRICS if metrics is None else metrics
+    found = set()
+    for dep in metrics[name].inputs:
+        found.update(source_columns(dep, metrics) if dep in metrics else [dep])
+    return found
+
+
+def _column_hash(series):
+    values = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    return hashlib.sha1(values.tobytes()).hexdigest()
+
+
+def definition(names, metrics=None):
+    """Name, version and code hash of every metric names are computed with"""
+    metrics = METRICS if metrics is None else metrics
+    return [(dep, metrics[dep].version, metrics[dep].code_hash()) for dep in resolve(names, None, metrics)]
+
+
+def definition_hash(names, metrics=None):
+    """Hash of definition(names), e.g. to key cached outputs of these metrics"""
+    payload = json.dumps(definition(names, metrics))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def fingerprint(name, column_hashes, metrics=None):
+    """Hash of a metric's definition (and its dependencies') and source column values"""
+    metrics = METRICS if metrics is None else metrics
+    payload = json.dumps({
+        'definition': definition([name], metrics),
+        'sources': {col: column_hashes[col] for col in sorted(source_columns(name, metrics))}
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def state_path(csv_path):
+    return csv_path + '.derived.json'
+
+
+def _load_state(csv_path):
+    try:
+        with open(state_path(csv_path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_state(csv_path, state):
+    directory = os.path.dirname(os.path.abspath(csv_path))
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, state_path(csv_path))
+
+
+def compute_frame(df, names, state=None, force=False, metrics=None):
+    """
+    Add the metrics in names to df (a copy), evaluating dependencies as
+    needed but only adding the requested columns. state holds the
+    fingerprints from the last run; returns (df, new state, computed names).
+    """
+    metrics = METRICS if metrics is None else metrics
+    state = dict(state or {})
+
+    # A metric already in the table whose source columns are not (e.g. TS%
+    # in the app tables, which have no FGA/FTA) cannot be checked; keep it
+    missing = {name: source_columns(name, metrics) - set(df.columns) for name in names}
+    for name in names:
+        if missing[name] and name not in df.columns:
+            raise KeyError(f"Cannot compute {name}, missing columns: "
+                           f"{', '.join(sorted(missing[name]))}")
+    names = [name for name in names if not missing[name]]
+    order = resolve(names, df.columns, metrics)
+
+    # Hash each source column once, however many metrics read it
+    sources = set()
+    for name in names:
+        sources.update(source_columns(name, metrics))
+    column_hashes = {col: _column_hash(df[col]) for col in sources}
+
+    stale = []
+    for name in names:
+        key = fingerprint(name, column_hashes, metrics)
+        if force or name not in df.columns or state.get(name) != key:
+            stale.append(name)
+        state[name] = key
+    if not stale:
+        return df, state, []
+
+    # Evaluate only what the stale metrics need, each expression once
+    values = {}
+    needed = set(resolve(stale, df.columns, metrics))
+    for name in order:
+        if name in needed:
+            inputs = [values[dep] if dep in values else df[dep] for dep in metrics[name].inputs]
+            values[name] = metrics[name].func(*inputs)
+
+    df = df.copy()
+    for name in stale:
+        df[name] = values[name]
+    return df, state, stale
+
+
+def compute_file(csv_path, names, force=False):
+    """
+    Bring the requested metrics of one table up to date, reading and
+    writing it at most once. Returns (path, computed names, skipped names).
+    """
+    df = read_table(csv_path)
+    previous = _load_state(csv_path)
+    df, state, computed = compute_frame(df, names, previous, force)
+    if computed:
+        write_table(df, csv_path)
+    if state != previous:
+        _save_state(csv_path, state)
+    return csv_path, computed, [name for name in names if name not in computed]
+
+
+def compute_files(paths, names, workers=None, force=False):
+    """compute_file for every path, one process per file up to workers"""
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [compute_file(path, names, force) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(compute_file, paths, [names] * len(paths), [force] * len(paths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add derived stats to season tables')
+    parser.add_argument('paths', nargs='+', help='season CSV files')
+    parser.add_argument('--metrics', nargs='+', default=['TS%'],
+                        help=f'default: TS%%; available: {", ".join(METRICS)}')
+    parser.add_argument('--workers', type=int, help='parallel files (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='recompute even if up to date')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.metrics if name not in METRICS]
+    if unknown:
+        parser.error(f'Unknown metrics: {", ".join(unknown)}')
+
+    for path, computed, skipped in compute_files(args.paths, args.metrics, args.workers, args.force):
+        print(f"{path}: computed {', '.join(computed) or 'nothing'}"
+              + (f"; up to date: {', '.join(skipped)}" if skipped else ''))
+
+
+if __name__ == '__main__':
+    main()
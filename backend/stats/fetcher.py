@@ -0,0 +1,270 @@
+"""
+Concurrent, rate-limited and resumable fetching from the NBA stats API.
+
+    fetcher = Fetcher(NBAApiTransport(), rate=2.0, workers=4,
+                      cache=ResponseCache('.nba_api_cache', ttl=86400),
+                      checkpoint=Checkpoint('nba_age.checkpoint.json', run=run_id))
+    results, errors = fetcher.fetch_many(
+        [('CommonPlayerInfo', {'player_id': pid}) for pid in player_ids])
+
+A transport is any callable(endpoint, params) -> dict, so runs can be
+pointed at a local stub server with HTTPTransport or at a plain function.
+"""
+import hashlib
+import importlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class FetchError(Exception):
+    """Raised when a request still fails after all retries"""
+
+
+def request_key(endpoint, params):
+    """Stable key for an (endpoint, params) request"""
+    payload = json.dumps([endpoint, params], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _write_json_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursting to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    On-disk cache of API responses, one JSON file per (endpoint, params).
+    Responses older than ttl seconds are fetched again; ttl=None keeps them
+    forever and ttl=0 refreshes everything (new responses are still stored).
+    """
+
+    def __init__(self, directory, ttl=None):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) >= self.ttl:
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, response):
+        _write_json_atomic(self._path(key), response)
+
+
+class Checkpoint:
+    """
+    Results of completed requests, persisted every `save_every` completions
+    so an interrupted run picks up where it stopped. A checkpoint belongs to
+    one run: a file saved under a different `run` id is ignored, and
+    Fetcher.fetch_many deletes it once the run completes without errors.
+    """
+
+    def __init__(self, path, run=None, save_every=25):
+        self.path = path
+        self.run = run
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.done = {}
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            saved = None
+        if isinstance(saved, dict) and saved.get('run') == run and isinstance(saved.get('done'), dict):
+            self.done = saved['done']
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def get(self, key):
+        return self.done.get(key)
+
+    def record(self, key, result):
+        with self._lock:
+            self.done[key] = result
+            self._pending += 1
+            if self._pending >= self.save_every:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def clear(self):
+        """Forget every result and delete the file"""
+        with self._lock:
+            self.done = {}
+            self._pending = 0
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _save(self):
+        _write_json_atomic(self.path, {'run': self.run, 'done': self.done})
+        self._pending = 0
+
+
+class NBAApiTransport:
+    """Calls nba_api endpoint classes by name, e.g. 'CommonPlayerInfo'"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def __call__(self, endpoint, params):
+        module = importlib.import_module('nba_api.stats.endpoints.' + endpoint.lower())
+        return getattr(module, endpoint)(timeout=self.timeout, **params).get_dict()
+
+
+class HTTPTransport:
+    """GETs base_url/<endpoint>?<params> and decodes the JSON body"""
+
+    def __init__(self, base_url, headers=None, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def __call__(self, endpoint, params):
+        url = f'{self.base_url}/{endpoint.lower()}?{urllib.parse.urlencode(params)}'
+        req = urllib.request.Request(url, headers=self.headers)
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return json.load(response)
+
+
+class Fetcher:
+    """
+    Bounded worker pool in front of a transport. Every network call waits
+    for the shared token bucket, failed calls are retried with exponential
+    backoff, and responses are served from the on-disk cache when present.
+    """
+
+    def __init__(self, transport, rate=1.5, burst=1, workers=4, retries=4,
+                 backoff=1.0, cache=None, checkpoint=None, sleep=time.sleep):
+        self.transport = transport
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self._sleep = sleep
+
+    def fetch(self, endpoint, params):
+        """Fetch one response, using the cache and retrying transient failures"""
+        key = request_key(endpoint, params)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.transport(endpoint, params)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise FetchError(f'{endpoint} {params} failed after {attempt + 1} attempts: {e}')
+                # Exponential backoff with jitter so workers don't retry in step
+                self._sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+        if self.cache is not None:
+            self.cache.put(key, response)
+        return response
+
+    def fetch_many(self, requests, transform=None, progress=None):
+        """
+        Fetch every (endpoint, params) in requests concurrently.
+
+        transform(response) reduces each response before it is checkpointed
+        (e.g. to just the fields a script needs). Returns (results, errors):
+        results maps request index -> transformed response and errors maps
+        request index -> exception for requests that failed. Failed requests
+        are not checkpointed, so they are retried on the next run; once
+        every request has succeeded the checkpoint is removed.
+        """
+        results = {}
+        errors = {}
+        todo = []
+        for i, (endpoint, params) in enumerate(requests):
+            key = request_key(endpoint, params)
+            if self.checkpoint is not None and key in self.checkpoint:
+                results[i] = self.checkpoint.get(key)
+            else:
+                todo.append((i, key, endpoint, params))
+
+        def run(endpoint, params):
+            response = self.fetch(endpoint, params)
+            return transform(response) if transform else response
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        finished = False
+        try:
+            futures = {pool.submit(run, endpoint, params): (i, key)
+                       for i, key, endpoint, params in todo}
+            for future in as_completed(futures):
+                i, key = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    errors[i] = e
+                else:
+                    if self.checkpoint is not None:
+                        self.checkpoint.record(key, results[i])
+                if progress:
+                    progress(i, results.get(i), errors.get(i))
+            finished = True
+        finally:
+            # On Ctrl-C, drop queued requests instead of draining them; the
+            # checkpoint keeps everything that completed
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self.checkpoint is not None:
+                if finished and not errors:
+                    self.checkpoint.clear()
+                else:
+                    self.checkpoint.save()
+        return results, errors
@@ -1,70 +1,115 @@
-import pandas as pd
-import time
-from nba_api.stats.endpoints import playercareerstats
-from nba_api.stats.library.http import NBAStatsHTTP
+import argparse
+import datetime
+import os
+import sys
+
+from fetcher import Checkpoint, Fetcher, NBAApiTransport, ResponseCache, request_key
+
+# Shared table storage lives with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from storage import read_table, write_table
 
 # Load the CSV file that contains player stats
 csv_file = 'nba_player_stats_2024-25_leaders.csv'
-leaders_df = pd.read_csv(csv_file)
 
-from nba_api.stats.endpoints import commonplayerinfo
-import datetime
+# Responses are cached on disk and completed players are checkpointed, so an
+# interrupted run resumes automatically when the script is started again the
+# same day. Cached responses older than NBA_API_CACHE_TTL seconds are fetched
+# again.
+cache_dir = '.nba_api_cache'
+cache_ttl = float(os.environ.get('NBA_API_CACHE_TTL', 86400))
+checkpoint_file = 'nba_age.checkpoint.json'
+
+# stats.nba.com starts refusing connections well above ~2 requests/second
+requests_per_second = float(os.environ.get('NBA_API_RATE', 1.5))
+workers = int(os.environ.get('NBA_API_WORKERS', 4))
+
+
+def birthdate_from_player_info(response):
+    """Reduce a CommonPlayerInfo response to the player's BIRTHDATE"""
+    result_set = next(rs for rs in response['resultSets'] if rs['name'] == 'CommonPlayerInfo')
+    row = dict(zip(result_set['headers'], result_set['rowSet'][0]))
+    # Fail here, inside the fetch, so a bad response is reported as an error
+    datetime.datetime.strptime(row['BIRTHDATE'], '%Y-%m-%dT%H:%M:%S')
+    return row['BIRTHDATE']
+
+
+def age_on(birthdate, today=None):
+    """Age in whole years on today (default: now) for a BIRTHDATE string"""
+    birth_date = datetime.datetime.strptime(birthdate, '%Y-%m-%dT%H:%M:%S')
+    today = today or datetime.datetime.now()
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+def run_id(player_ids, today=None):
+    """Checkpoint run id: the players asked for, on one day"""
+    today = today or datetime.date.today()
+    return request_key('ages', [sorted(int(player_id) for player_id in player_ids), today.isoformat()])
+
+
+def default_fetcher(run=None, refresh=False):
+    return Fetcher(
+        NBAApiTransport(),
+        rate=requests_per_second,
+        workers=workers,
+        cache=ResponseCache(cache_dir, ttl=0 if refresh else cache_ttl),
+        checkpoint=Checkpoint(checkpoint_file, run=run)
+    )
+
+
+def fetch_ages(player_ids, fetcher=None, progress=None, refresh=False):
+    """
+    Fetch the current age of every player id. Returns (ages, errors), both
+    keyed by position in player_ids. Birth dates are what gets cached and
+    checkpointed; ages are computed from them as of now.
+    """
+    fetcher = fetcher or default_fetcher(run_id(player_ids), refresh)
+
+    def report(i, birthdate, error):
+        progress(i, None if birthdate is None else age_on(birthdate), error)
+
+    birthdates, errors = fetcher.fetch_many(
+        [('CommonPlayerInfo', {'player_id': int(player_id)}) for player_id in player_ids],
+        transform=birthdate_from_player_info,
+        progress=report if progress else None
+    )
+    return {i: age_on(birthdate) for i, birthdate in birthdates.items()}, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the Age column from the NBA stats API')
+    parser.add_argument('--refresh', action='store_true', help='ignore cached API responses')
+    args = parser.parse_args()
+
+    leaders_df = read_table(csv_file, mmap=False)
+
+    # Extract player IDs from the dataframe
+    player_id_column = 'PLAYER_ID'
+    if player_id_column not in leaders_df.columns:
+        print(f"Column '{player_id_column}' not found. Available columns:", leaders_df.columns.tolist())
+        return
+
+    player_ids = leaders_df[player_id_column].tolist()
+
+    def progress(i, age, error):
+        if error is not None:
+            print(f"Row {i+1}: Error retrieving data for player ID {player_ids[i]}: {error}")
+        else:
+            print(f"Row {i+1}: Retrieved age {age} for player ID {player_ids[i]}")
+
+    ages, errors = fetch_ages(player_ids, progress=progress, refresh=args.refresh)
+
+    # Rows that failed keep their previous age; rerunning the script retries
+    # only them
+    previous = leaders_df['Age'].tolist() if 'Age' in leaders_df.columns else [None] * len(player_ids)
+    leaders_df['Age'] = [ages.get(i, previous[i]) for i in range(len(player_ids))]
 
-# Check the columns to identify player ID column
-print("DataFrame columns:", leaders_df.columns.tolist())
-
-# Extract player IDs from the dataframe
-# Assuming the column is named 'PLAYER_ID' - adjust if needed
-player_id_column = 'PLAYER_ID'
-if player_id_column not in leaders_df.columns:
-    print(f"Column '{player_id_column}' not found. Available columns:", leaders_df.columns.tolist())
-else:
-    # Start from row 303 (index 302 since Python is 0-indexed)
-    start_row = 301
-    print(f"Starting from row {start_row+1} (index {start_row})")
-    
-    # Create a list of player IDs starting from row 303
-    player_ids = leaders_df[player_id_column].iloc[start_row:].tolist()
-    
-    # Create a list to store player ages
-    player_ages = []
-    processed_indices = []
-    
-    # Iterate through player IDs to get their ages
-    for i, player_id in enumerate(player_ids):
-        current_row = start_row + i
-        try:
-            # Add delay to avoid rate limits
-            time.sleep(0.6)
-            
-            # Call playercareerstats as requested
-            career = playercareerstats.PlayerCareerStats(player_id=player_id)
-            
-            # Get age information using commonplayerinfo
-            player_info = commonplayerinfo.CommonPlayerInfo(player_id=player_id)
-            data = player_info.get_normalized_dict()
-            
-            # Extract birth date and calculate age
-            birth_date_str = data['CommonPlayerInfo'][0]['BIRTHDATE']
-            birth_date = datetime.datetime.strptime(birth_date_str, '%Y-%m-%dT%H:%M:%S')
-            today = datetime.datetime.now()
-            age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            
-            player_ages.append(age)
-            processed_indices.append(current_row)
-            print(f"Row {current_row+1}: Retrieved age {age} for player ID {player_id}")
-        except Exception as e:
-            print(f"Row {current_row+1}: Error retrieving data for player ID {player_id}: {e}")
-            player_ages.append(None)  # Append None for failed requests
-            processed_indices.append(current_row)
-    
-    # Update only the processed rows with their ages
-    for idx, age in zip(processed_indices, player_ages):
-        if 'Age' not in leaders_df.columns:
-            leaders_df['Age'] = None
-        leaders_df.at[idx, 'Age'] = age
-    
     # Save the updated dataframe back to CSV
-    leaders_df.to_csv(csv_file, index=False)
-    print(f"Updated Age column for rows starting from {start_row+1} and saved to {csv_file}")
+    write_table(leaders_df, csv_file)
+    print(f"Updated Age column for {len(ages)} of {len(player_ids)} players and saved to {csv_file}")
+    if errors:
+        print(f"{len(errors)} players failed; run the script again to retry them")
+
 
+if __name__ == '__main__':
+    main()
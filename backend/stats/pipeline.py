@@ -0,0 +1,383 @@
+"""
+Incremental stats pipeline.
+
+Each step of the data flow is a Stage with declared inputs (upstream
+stages, parameters and source files). A stage's key is a hash of its code,
+parameters, source-file contents and the content hashes of its inputs; a
+stage only runs when that key changed since the last run. Independent
+stages run in parallel, and outputs are handed to downstream stages in
+memory. Every output is also kept as a columnar snapshot in the state
+directory so a later run can skip it, and final tables are exported to CSV.
+
+    python pipeline.py --season 2024-25
+    python pipeline.py --season 2024-25 --leaders-csv nba_player_stats_2024-25_leaders.csv
+    python pipeline.py --season 2023-24 --age-offset 1 --refresh leaders
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from calculate_per_game_stats import per_game_stats
+from calculatets import true_shooting_percentage
+from deductage import deduct_age
+from derived import PER_GAME, definition_hash
+from salaryjoin import join_salaries, print_report
+
+STATS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(STATS_DIR)
+
+# Shared table storage and scoring live with the app
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'app'))
+from storage import load_snapshot, write_snapshot, write_table
+
+
+def hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_hash(modules, settings=None):
+    """
+    Hash of the source of modules plus settings, for a stage's version when
+    its function delegates to code in other modules (code_hash only sees
+    the function itself)
+    """
+    digest = hashlib.sha1()
+    for module in modules:
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def hash_frame(df):
+    """Content hash of a DataFrame's columns, dtypes and values"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    One pipeline step. func receives the outputs of `inputs` (in order) as
+    DataFrames plus `params` as keyword arguments, and returns a DataFrame.
+    `files` are source files whose contents are part of the stage key, and
+    `export` is an optional CSV path the output is written to.
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, files=(), export=None, version=1):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.files = list(files)
+        self.export = export
+        self.version = version
+
+    def code_hash(self):
+        try:
+            source = inspect.getsource(self.func)
+        except (OSError, TypeError):
+            source = getattr(self.func, '__qualname__', repr(self.func))
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    def key(self, input_hashes):
+        payload = json.dumps({
+            'name': self.name,
+            'version': self.version,
+            'code': self.code_hash(),
+            'params': self.params,
+            'files': {path: hash_file(path) for path in self.files},
+            'inputs': input_hashes
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class Pipeline:
+    """Runs a DAG of stages, skipping those whose key is unchanged"""
+
+    def __init__(self, stages, state_dir, workers=4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_dir = state_dir
+        self.workers = workers
+        self._lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+
+        for stage in stages:
+            unknown = [name for name in stage.inputs if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {', '.join(unknown)}")
+        self._check_acyclic()
+
+        try:
+            with open(self._state_path()) as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _state_path(self):
+        return os.path.join(self.state_dir, 'state.json')
+
+    def _snapshot_path(self, name):
+        # Snapshots of stage outputs have no CSV; the snapshot is the table
+        return os.path.join(self.state_dir, name + '.csv')
+
+    def _save_state(self):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.state_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self._state_path())
+
+    def _required(self, targets):
+        required = set()
+
+        def visit(name):
+            if name not in required:
+                required.add(name)
+                for dep in self.stages[name].inputs:
+                    visit(dep)
+
+        for name in targets or self.stages:
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'")
+            visit(name)
+        return required
+
+    def run(self, targets=None, refresh=(), log=print):
+        """
+        Run the stages needed for targets (default: all). Stages named in
+        refresh always run. Returns {stage: 'ran' | 'skipped' | 'failed' |
+        'blocked'}.
+        """
+        required = self._required(targets)
+        outputs = {}
+        output_hashes = {}
+        status = {}
+
+        def load_output(name):
+            # Skipped stages' outputs are only loaded if a stage that runs needs them
+            with self._lock:
+                if name not in outputs:
+                    outputs[name] = load_snapshot(self._snapshot_path(name), mmap=False)
+                return outputs[name]
+
+        def execute(name):
+            stage = self.stages[name]
+            key = stage.key([output_hashes[dep] for dep in stage.inputs])
+            previous = self.state.get(name, {})
+            snapshot_exists = os.path.exists(os.path.join(self._snapshot_path(name) + '.snapshot', 'meta.json'))
+
+            if name not in refresh and previous.get('key') == key and snapshot_exists:
+                if stage.export and not os.path.exists(stage.export):
+                    write_table(load_output(name), stage.export)
+                return 'skipped', previous['output'], None
+
+            log(f'[{name}] running')
+            start = time.perf_counter()
+            df = stage.func(*[load_output(dep) for dep in stage.inputs], **stage.params)
+            output_hash = hash_frame(df)
+            write_snapshot(df, self._snapshot_path(name))
+            if stage.export:
+                write_table(df, stage.export)
+
+            with self._lock:
+                self.state[name] = {
+                    'key': key,
+                    'output': output_hash,
+                    'rows': len(df),
+                    'seconds': round(time.perf_counter() - start, 3),
+                    'finished_at': time.time()
+                }
+                self._save_state()
+            return 'ran', output_hash, df
+
+        pending = set(required)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                for name in sorted(pending):
+                    deps = self.stages[name].inputs
+                    if any(status.get(dep) in ('failed', 'blocked') for dep in deps):
+                        status[name] = 'blocked'
+                        pending.discard(name)
+                        log(f'[{name}] blocked by a failed input')
+                    elif all(dep in output_hashes for dep in deps):
+                        pending.discard(name)
+                        running[pool.submit(execute, name)] = name
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        result, output_hash, df = future.result()
+                    except Exception as e:
+                        status[name] = 'failed'
+                        log(f'[{name}] failed: {e}')
+                        continue
+                    status[name] = result
+                    output_hashes[name] = output_hash
+                    if df is not None:
+                        with self._lock:
+                            outputs[name] = df
+                    log(f'[{name}] {result}')
+        return status
+
+
+# Stage functions. Each takes its input tables and returns a new table
+# without modifying them.
+
+def load_leaders(season, leaders_csv=None):
+    if leaders_csv:
+        return pd.read_csv(leaders_csv)
+    from nba_data import fetch_league_leaders
+    return fetch_league_leaders(season)
+
+
+def player_ages(leaders):
+    """Age per PLAYER_ID, only fetching players the leaders table has no age for"""
+    ages = leaders[['PLAYER_ID']].copy()
+    ages['Age'] = leaders['Age'] if 'Age' in leaders.columns else float('nan')
+    missing = ages['Age'].isna().to_numpy().nonzero()[0]
+    if len(missing):
+        from nba_age import fetch_ages
+        fetched, _ = fetch_ages(ages['PLAYER_ID'].iloc[missing].tolist())
+        for i, age in fetched.items():
+            ages.iloc[missing[i], ages.columns.get_loc('Age')] = age
+    return ages
+
+
+def with_ages(stats, ages, age_offset=0):
+    """Attach ages to the stats, shifted back by age_offset years for past seasons"""
+    stats = stats.drop(columns=['Age'], errors='ignore')
+    stats = stats.merge(ages.drop_duplicates('PLAYER_ID'), on='PLAYER_ID', how='left')
+    return deduct_age(stats, age_offset) if age_offset else stats
+
+
+def load_salary_table(path):
+    return pd.read_csv(path)
+
+
+def with_salaries(stats, salaries, salary_col):
+    stats = stats.copy()
+    stats['SALARY'], report = join_salaries(stats, salaries, salary_col)
+    print_report(report)
+    return stats
+
+
+def app_table(stats):
+    """Select and rename the columns the app's player table uses"""
+    stats = stats.rename(columns={'REB': 'TRB', 'SALARY': 'Salary'})
+    return stats[['PLAYER', 'TEAM', 'Age', 'GP', 'PTS', 'TRB', 'AST', 'BLK', 'Salary', 'TS%']].copy()
+
+
+def scored_table(players, model_path):
+    from joblib import load
+    from analysis import score_players
+    scored, dropped_count = score_players(players.copy(), load(model_path))
+    if dropped_count:
+        print(f'Dropped {dropped_count} players with missing inputs')
+    return scored
+
+
+def build_stages(season, leaders_csv=None, salaries_csv=None, salary_col=None,
+                 age_offset=0, model_path=None, export=None):
+    """The stats -> app table data flow for one season"""
+    short_season = season[2:]
+    salaries_csv = salaries_csv or os.path.join(STATS_DIR, 'nba_salaries.csv')
+    salary_col = salary_col or f'{season[:4]}/{int(season[:4]) + 1}'
+    model_path = model_path or os.path.join(BACKEND_DIR, 'model', 'linear_regression_model.joblib')
+    export = export or os.path.join(BACKEND_DIR, 'app', f'nba_stats_{short_season}_new.csv')
+
+    # Matching and scoring live in other modules; key their stages on that
+    # code and on the valuation band settings too
+    import analysis
+    import features
+    import names
+    import salaryjoin
+    import valuation
+    matching_version = source_hash([salaryjoin, names])
+    scoring_version = source_hash([analysis, features, valuation],
+                                  {'band': valuation.VALUATION_BAND, 'band_pct': valuation.VALUATION_BAND_PCT})
+
+    return [
+        Stage('leaders', load_leaders,
+              params={'season': season, 'leaders_csv': leaders_csv},
+              files=[leaders_csv] if leaders_csv else []),
+        Stage('ages', player_ages, inputs=['leaders']),
+        # These stages hash only their wrappers; the metric definitions
+        # they evaluate are keyed through version
+        Stage('true_shooting', true_shooting_percentage, inputs=['leaders'],
+              version=definition_hash(['TS%'])),
+        Stage('with_ages', with_ages, inputs=['true_shooting', 'ages'], params={'age_offset': age_offset}),
+        Stage('salary_table', load_salary_table, params={'path': salaries_csv}, files=[salaries_csv]),
+        Stage('with_salaries', with_salaries, inputs=['with_ages', 'salary_table'],
+              params={'salary_col': salary_col}, version=matching_version),
+        Stage('per_game', per_game_stats, inputs=['with_salaries'],
+              version=definition_hash(list(PER_GAME.values()))),
+        Stage('app_table', app_table, inputs=['per_game']),
+        Stage('scored', scored_table, inputs=['app_table'], params={'model_path': model_path},
+              files=[model_path], export=export, version=scoring_version),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the app player table for a season')
+    parser.add_argument('--season', default='2024-25')
+    parser.add_argument('--leaders-csv', help='use a saved league leaders CSV instead of the NBA API')
+    parser.add_argument('--salaries-csv')
+    parser.add_argument('--salary-col', help="salary column to join, e.g. '2024/2025'")
+    parser.add_argument('--age-offset', type=int, default=0,
+                        help='years to deduct from current ages (for past seasons)')
+    parser.add_argument('--model')
+    parser.add_argument('--export', help='CSV path for the final table')
+    parser.add_argument('--state-dir', help='where stage snapshots and keys are kept')
+    parser.add_argument('--refresh', nargs='*', default=[], help='stages to run even if unchanged')
+    parser.add_argument('--target', nargs='*', help='only run these stages and their inputs')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    leaders_csv = os.path.abspath(args.leaders_csv) if args.leaders_csv else None
+    stages = build_stages(args.season, leaders_csv, args.salaries_csv, args.salary_col,
+                          args.age_offset, args.model, args.export)
+    state_dir = args.state_dir or os.path.join(STATS_DIR, '.pipeline', args.season)
+    status = Pipeline(stages, state_dir, workers=args.workers).run(args.target, set(args.refresh))
+
+    failed = [name for name, result in status.items() if result in ('failed', 'blocked')]
+    if failed:
+        print(f"Pipeline incomplete: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,20 @@
 import pandas as pd
 import os
+import sys
+
+from salaryjoin import SalaryIndex, join_salaries, print_report
+
+# Shared table storage lives with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from storage import read_table, write_table
 
 def load_datasets(stats_path, salaries_path):
     """
     Load the NBA stats and salaries datasets
     """
     try:
-        stats_df = pd.read_csv(stats_path)
-        salaries_df = pd.read_csv(salaries_path)
+        stats_df = read_table(stats_path, mmap=False)
+        salaries_df = read_table(salaries_path)
         return stats_df, salaries_df
     except FileNotFoundError as e:
         print(f"Error: File not found - {e}")
@@ -16,35 +23,15 @@ def load_datasets(stats_path, salaries_path):
         print(f"Error loading datasets: {e}")
         return None, None
 
-def get_player_salary(player_name, salaries_df, salary_col='2024/2025'):
+def get_player_salary(player_name, index):
     """
-    Get the 2023/2024 salary for a given player
+    Get a player's salary from a SalaryIndex, built once per salary table
+    and column and shared by every lookup
     """
-    # Search for the player in the salaries dataframe
-    player_row = salaries_df[salaries_df['PLAYER'].str.contains(player_name, case=False, na=False)]
-    
-    # if player_row.empty:
-    #     # Try matching on last name if full name doesn't match
-    #     last_name = player_name.split()[-1]
-    #     player_row = salaries_df[salaries_df['PLAYER'].str.contains(last_name, case=False, na=False)]
-        
-    #     if player_row.empty:
-    #         return None
-    #     elif len(player_row) > 1:
-    #         print(f"Multiple matches found for {player_name}. Using first match: {player_row.iloc[0]['PLAYER']}")
-    
-    # Return the 2023/2024 salary if available
-    try:
-        if salary_col in player_row.columns:
-            salary = player_row[salary_col].values[0]
-            salary = salary.replace('$', '').replace(',', '')
-            return salary
-        else:
-            print(f"Salary column '{salary_col}' not found. Available columns: {player_row.columns.tolist()}")
-            return None
-    except Exception as e:
-        print(f"Error retrieving salary: {e}")
+    salary = index.lookup(player_name)
+    if salary is None or pd.isna(salary):
         return None
+    return salary
 
 def merge_stats_with_salaries(stats_df, salaries_df, salary_col='2024/2025', player_col='PLAYER'):
     """
@@ -53,10 +40,9 @@ def merge_stats_with_salaries(stats_df, salaries_df, salary_col='2024/2025', pla
     if stats_df is None or salaries_df is None:
         return None
     
-    # Create a new column in the stats dataframe for salary
-    stats_df['SALARY'] = stats_df[player_col].apply(
-        lambda player: get_player_salary(player, salaries_df, salary_col)
-    )
+    # Hash join on PLAYER_ID / normalized names, fuzzy only for leftovers
+    stats_df['SALARY'], report = join_salaries(stats_df, salaries_df, salary_col, player_col)
+    print_report(report)
     return stats_df
 
 def main():
@@ -92,7 +78,7 @@ def main():
     player_name = input("Enter a player name to search for (or press Enter to process all players): ")
     
     if player_name:
-        salary = get_player_salary(player_name, salaries_df, salary_col)
+        salary = get_player_salary(player_name, SalaryIndex(salaries_df, salary_col))
         if salary is not None:
             print(f"{player_name}'s salary for 2023/2024: {salary}")
         else:
@@ -104,7 +90,7 @@ def main():
         if merged_df is not None:
             # Save the merged dataframe
             output_path = os.path.join(base_dir, 'nba_stats_with_salaries.csv')
-            merged_df.to_csv(output_path, index=False)
+            write_table(merged_df, output_path)
             print(f"Saved merged data to {output_path}")
             
             # Show example data
@@ -0,0 +1,193 @@
+"""
+Join player stats to salaries through precomputed indexes.
+
+Rows are matched by PLAYER_ID when both tables carry it, then by
+normalized name (accents, punctuation and Jr./III-style suffixes removed)
+through a hash index. Only rows still unmatched after that go to a bounded
+fuzzy matcher, which compares each leftover against unclaimed salary names
+sharing the same first and last initials.
+"""
+import difflib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Name normalization is shared with the app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+from names import normalize_name, normalize_names
+
+FUZZY_CUTOFF = 0.88
+# Two fuzzy candidates scoring within this margin are reported as ambiguous
+AMBIGUITY_MARGIN = 0.02
+
+
+def parse_salaries(values):
+    """'$51,915,615 ' -> 51915615.0; anything unparseable becomes NaN"""
+    cleaned = pd.Series(values, copy=False).astype(str).str.replace(r'[$,\s]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce')
+
+
+class SalaryIndex:
+    """
+    Hash indexes over a salary table: normalized name -> row positions and,
+    when the table has an id column, id -> row position
+    """
+
+    def __init__(self, salaries_df, salary_col, player_col='PLAYER', id_col=None):
+        if salary_col not in salaries_df.columns:
+            raise KeyError(f"Salary column '{salary_col}' not found. "
+                           f"Available columns: {salaries_df.columns.tolist()}")
+        self.names = salaries_df[player_col].to_numpy()
+        self.salaries = parse_salaries(salaries_df[salary_col]).to_numpy()
+        self.normalized = normalize_names(salaries_df[player_col]).to_numpy()
+
+        self.by_name = pd.Series(np.arange(len(salaries_df))).groupby(self.normalized, sort=False).indices
+        self.first_position = {key: rows[0] for key, rows in self.by_name.items()}
+        # Normalized names shared by salary rows with different amounts
+        self.ambiguous_names = {key for key, rows in self.by_name.items()
+                                if len(rows) > 1 and len(np.unique(self.salaries[rows])) > 1}
+        self.by_id = None
+        if id_col is not None and id_col in salaries_df.columns:
+            self.by_id = pd.Series(np.arange(len(salaries_df)), index=salaries_df[id_col].to_numpy())
+            self.by_id = self.by_id[~self.by_id.index.duplicated()]
+
+        # Fuzzy candidates bucketed by first and last initial
+        self.buckets = {}
+        for position, name in enumerate(self.normalized):
+            if name:
+                self.buckets.setdefault(self._bucket(name), []).append(position)
+
+    @staticmethod
+    def _bucket(name):
+        parts = name.split()
+        return parts[0][0] + parts[-1][0]
+
+    def lookup(self, player_name):
+        """Salary for a single name: exact normalized match, else fuzzy"""
+        key = normalize_name(player_name)
+        positions = self.by_name.get(key)
+        if positions is None:
+            position, _, _ = self.fuzzy(key)
+            if position is None:
+                return None
+            positions = [position]
+        return self.salaries[positions[0]]
+
+    def fuzzy(self, key, exclude=()):
+        """
+        Best fuzzy candidate for a normalized name: (position, score,
+        rivals), rivals being the other positions scoring within
+        AMBIGUITY_MARGIN of it, best first (empty when the match is clear)
+        """
+        if not key:
+            return None, 0.0, []
+        # SequenceMatcher caches its second sequence, so the query goes there
+        matcher = difflib.SequenceMatcher(None)
+        matcher.set_seq2(key)
+        scored = []
+        for position in self.buckets.get(self._bucket(key), []):
+            if position in exclude:
+                continue
+            matcher.set_seq1(self.normalized[position])
+            if matcher.real_quick_ratio() >= FUZZY_CUTOFF and matcher.quick_ratio() >= FUZZY_CUTOFF:
+                score = matcher.ratio()
+                if score >= FUZZY_CUTOFF:
+                    scored.append((score, position))
+        if not scored:
+            return None, 0.0, []
+        scored.sort(reverse=True)
+        best, position = scored[0]
+        rivals = [other for score, other in scored[1:] if best - score < AMBIGUITY_MARGIN]
+        return position, best, rivals
+
+
+def join_salaries(stats_df, salaries_df, salary_col='2024/2025', player_col='PLAYER',
+                  id_col='PLAYER_ID', fuzzy=True, max_fuzzy=1000, index=None):
+    """
+    Match every stats row to a salary.
+
+    Returns (salaries, report): salaries is a float Series aligned with
+    stats_df (NaN where unmatched) and report summarizes the match rate,
+    ambiguous names and fuzzy matches.
+    """
+    if index is None:
+        index = SalaryIndex(salaries_df, salary_col, player_col, id_col)
+
+    n = len(stats_df)
+    positions = np.full(n, -1, dtype=np.int64)
+    method = np.full(n, '', dtype=object)
+
+    # 1. Exact id join when both sides carry the id
+    if index.by_id is not None and id_col in stats_df.columns:
+        found = index.by_id.reindex(stats_df[id_col].to_numpy()).to_numpy()
+        hit = ~np.isnan(found)
+        positions[hit] = found[hit].astype(np.int64)
+        method[hit] = 'id'
+
+    # 2. Normalized-name hash join for everything else
+    keys = normalize_names(stats_df[player_col]).to_numpy()
+    todo = positions < 0
+    found = pd.Series(keys[todo]).map(index.first_position).to_numpy(dtype=np.float64)
+    hit = ~np.isnan(found)
+    rows = np.flatnonzero(todo)[hit]
+    positions[rows] = found[hit].astype(np.int64)
+    method[rows] = 'name'
+
+    # Same normalized name on several salary rows with different amounts
+    ambiguous = []
+    for row in rows[np.isin(keys[rows], list(index.ambiguous_names))]:
+        candidates = index.by_name[keys[row]]
+        ambiguous.append({
+            'player': stats_df[player_col].iloc[row],
+            'candidates': [index.names[p] for p in candidates],
+            'method': 'name'
+        })
+
+    # 3. Bounded fuzzy matching for at most max_fuzzy leftovers against
+    # unclaimed names
+    fuzzy_matches = []
+    if fuzzy:
+        claimed = set(positions[positions >= 0].tolist())
+        for row in np.flatnonzero(positions < 0)[:max_fuzzy]:
+            position, score, rivals = index.fuzzy(keys[row], exclude=claimed)
+            if position is None:
+                continue
+            positions[row] = position
+            method[row] = 'fuzzy'
+            claimed.add(position)
+            player = stats_df[player_col].iloc[row]
+            fuzzy_matches.append({'player': player, 'matched': index.names[position], 'score': round(score, 3)})
+            if rivals:
+                ambiguous.append({'player': player, 'candidates': [index.names[p] for p in [position] + rivals],
+                                  'method': 'fuzzy'})
+
+    matched = positions >= 0
+    salaries = np.full(n, np.nan)
+    salaries[matched] = index.salaries[positions[matched]]
+
+    report = {
+        'rows': n,
+        'matched': int(matched.sum()),
+        'by_id': int((method == 'id').sum()),
+        'by_name': int((method == 'name').sum()),
+        'by_fuzzy': int((method == 'fuzzy').sum()),
+        'unmatched': int((~matched).sum()),
+        'match_rate': float(matched.mean()) if n else 0.0,
+        'ambiguous': ambiguous,
+        'fuzzy_matches': fuzzy_matches,
+        'unmatched_players': stats_df[player_col][~matched].tolist()
+    }
+    return pd.Series(salaries, index=stats_df.index, name='SALARY'), report
+
+
+def print_report(report):
+    print(f"Matched {report['matched']} of {report['rows']} players ({report['match_rate']:.1%}): "
+          f"{report['by_id']} by id, {report['by_name']} by name, {report['by_fuzzy']} fuzzy")
+    for match in report['fuzzy_matches']:
+        print(f"  fuzzy: {match['player']} -> {match['matched']} ({match['score']})")
+    for entry in report['ambiguous']:
+        print(f"  ambiguous ({entry['method']}): {entry['player']} -> {', '.join(entry['candidates'])}")
+    if report['unmatched_players']:
+        print(f"  unmatched: {', '.join(map(str, report['unmatched_players']))}")
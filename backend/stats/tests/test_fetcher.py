@@ -0,0 +1,125 @@
+import datetime
+import json
+import os
+
+import pytest
+
+from fetcher import Checkpoint, FetchError, Fetcher, ResponseCache
+from nba_age import age_on, fetch_ages
+
+
+class StubTransport:
+    """Answers from a dict, failing each (endpoint, player) `failures` times first"""
+
+    def __init__(self, responses, failures=None):
+        self.responses = responses
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def __call__(self, endpoint, params):
+        player = params['player_id']
+        self.calls.append((endpoint, player))
+        if self.failures.get(player, 0):
+            self.failures[player] -= 1
+            raise ConnectionError(f'stub failure for {player}')
+        return self.responses[player]
+
+
+def player_info(birthdate):
+    return {'resultSets': [{'name': 'CommonPlayerInfo', 'headers': ['BIRTHDATE'], 'rowSet': [[birthdate]]}]}
+
+
+def requests(*players):
+    return [('CommonPlayerInfo', {'player_id': player}) for player in players]
+
+
+def make_fetcher(transport, sleeps=None, **kwargs):
+    sleep = sleeps.append if sleeps is not None else (lambda seconds: None)
+    return Fetcher(transport, rate=1000, burst=100, workers=2, backoff=1.0, sleep=sleep, **kwargs)
+
+
+def test_retries_with_exponential_backoff():
+    transport = StubTransport({1: {'ok': 1}}, failures={1: 3})
+    sleeps = []
+    results, errors = make_fetcher(transport, sleeps).fetch_many(requests(1))
+
+    assert results == {0: {'ok': 1}} and errors == {}
+    assert len(transport.calls) == 4
+    # backoff * 2**attempt, jittered by 0.5x-1.5x
+    for attempt, seconds in enumerate(sleeps):
+        assert 0.5 * 2 ** attempt <= seconds < 1.5 * 2 ** attempt
+
+
+def test_gives_up_after_retries():
+    transport = StubTransport({1: {}}, failures={1: 10})
+    results, errors = make_fetcher(transport, retries=2).fetch_many(requests(1))
+
+    assert results == {}
+    assert isinstance(errors[0], FetchError)
+    assert len(transport.calls) == 3
+
+
+def test_checkpoint_resumes_only_failed_requests(tmp_path):
+    path = str(tmp_path / 'run.checkpoint.json')
+    responses = {1: {'n': 1}, 2: {'n': 2}, 3: {'n': 3}}
+
+    first = StubTransport(responses, failures={2: 10})
+    results, errors = make_fetcher(first, retries=0, checkpoint=Checkpoint(path, run='a')).fetch_many(
+        requests(1, 2, 3))
+    assert set(results) == {0, 2} and set(errors) == {1}
+    with open(path) as f:
+        assert json.load(f)['run'] == 'a'
+
+    second = StubTransport(responses)
+    results, errors = make_fetcher(second, checkpoint=Checkpoint(path, run='a')).fetch_many(requests(1, 2, 3))
+    assert results == {0: {'n': 1}, 1: {'n': 2}, 2: {'n': 3}} and errors == {}
+    assert second.calls == [('CommonPlayerInfo', 2)]
+    # A completed run leaves no checkpoint behind
+    assert not os.path.exists(path)
+
+
+def test_checkpoint_of_another_run_is_ignored(tmp_path):
+    path = str(tmp_path / 'run.checkpoint.json')
+    checkpoint = Checkpoint(path, run='yesterday')
+    checkpoint.record('key', 'stale')
+    checkpoint.save()
+
+    assert 'key' in Checkpoint(path, run='yesterday')
+    assert 'key' not in Checkpoint(path, run='today')
+
+
+def test_cache_hits_skip_the_transport(tmp_path):
+    transport = StubTransport({1: {'n': 1}})
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    fetcher = make_fetcher(transport, cache=cache)
+
+    assert fetcher.fetch('CommonPlayerInfo', {'player_id': 1}) == {'n': 1}
+    assert fetcher.fetch('CommonPlayerInfo', {'player_id': 1}) == {'n': 1}
+    assert len(transport.calls) == 1
+
+
+def test_expired_cache_entries_are_fetched_again(tmp_path):
+    transport = StubTransport({1: {'n': 1}})
+    directory = str(tmp_path / 'cache')
+    make_fetcher(transport, cache=ResponseCache(directory)).fetch('CommonPlayerInfo', {'player_id': 1})
+    make_fetcher(transport, cache=ResponseCache(directory, ttl=0)).fetch('CommonPlayerInfo', {'player_id': 1})
+    assert len(transport.calls) == 2
+
+
+def test_ages_are_computed_from_checkpointed_birthdates(tmp_path):
+    path = str(tmp_path / 'ages.checkpoint.json')
+    transport = StubTransport({1: player_info('1990-06-15T00:00:00'), 2: {'resultSets': []}})
+    ages, errors = fetch_ages([1, 2], fetcher=make_fetcher(transport, retries=0,
+                                                           checkpoint=Checkpoint(path, run='r')))
+
+    assert ages == {0: age_on('1990-06-15T00:00:00')}
+    assert set(errors) == {1}
+    # The birth date, not the age it gave today, is what a resumed run reuses
+    assert list(Checkpoint(path, run='r').done.values()) == ['1990-06-15T00:00:00']
+
+
+def test_age_on():
+    assert age_on('1990-06-15T00:00:00', datetime.datetime(2025, 6, 14)) == 34
+    assert age_on('1990-06-15T00:00:00', datetime.datetime(2025, 6, 15)) == 35
+    with pytest.raises(ValueError):
+        age_on('June 1990')